@@ -2,9 +2,13 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from flask_compress import Compress
+from flask_caching import Cache
 
 db = SQLAlchemy()
 migrate = Migrate()
+compress = Compress()
+cache = Cache()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
@@ -33,6 +37,8 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
+    compress.init_app(app)
+    cache.init_app(app)
 
     # Setup comprehensive logging
     from app.logging_config import setup_logging
@@ -1,16 +1,41 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from flask_login import login_required, current_user
 from functools import wraps
-from app import db
+from werkzeug.utils import secure_filename
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from app import db, cache
+from app.utils import ojsonify, run_in_background, update_background_job
 from app.models import (User, Customer, Form, CallsheetEntry, Callsheet, StandingOrder,
-                       StandingOrderLog, StockTransaction, CustomerStock, CompanyUpdate, Product, CallHistory)
+                       StandingOrderLog, StockTransaction, CustomerStock, CompanyUpdate, Product, CallHistory,
+                       BackgroundJob, DailyActivityStats, CustomerCallStatsDaily,
+                       CustomerCallStatsCoverage)
 from datetime import datetime, timedelta
-from sqlalchemy import func, cast, Date, extract, case, and_, desc
+from collections import defaultdict
+from operator import attrgetter
+from dateutil.relativedelta import relativedelta
+from itertools import chain, islice
+from sqlalchemy import event, select, insert, delete, bindparam, text, func, cast, Date, Integer, String, extract, case, and_, or_, desc, tuple_, union_all, literal, null
+from sqlalchemy.orm import Session, object_session
+import click
 import pandas as pd
+import numpy as np
+import openpyxl
+import codecs
+import csv
+import heapq
+import io
+import os
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional - Excel imports fall back to openpyxl/pandas
+    CalamineWorkbook = None
+
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 def admin_required(f):
@@ -24,6 +49,123 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Report responses are cached briefly; a commit that wrote a reported model bumps
+# the generation so the next request recomputes instead of serving stale numbers.
+# The bump only reaches other workers through a shared CACHE_TYPE (see ProductionConfig)
+REPORT_CACHE_TIMEOUT = 60
+REPORT_GENERATION_KEY = 'reports:generation'
+
+def _report_cache_key():
+    """Cache key for a report request - endpoint plus its sorted query args (date range etc.)"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f"reports:{cache.get(REPORT_GENERATION_KEY) or 0}:{request.path}?{args}"
+
+def _cacheable(response):
+    """Only cache successful responses - error tuples and 500s are recomputed"""
+    return getattr(response, 'status_code', None) == 200
+
+REPORT_MODELS = (Form, CallsheetEntry, Callsheet, CallHistory, StockTransaction, Customer,
+                 StandingOrder, StandingOrderLog)
+
+def _mark_reports_stale(session):
+    """
+    Flag the session so the report generation is bumped once it commits. Core
+    writes (the import upserts) fire no ORM events and must call this themselves.
+    """
+    session.info['invalidate_reports'] = True
+
+def _mark_reports_written(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _mark_reports_stale(session)
+
+for _model in REPORT_MODELS:
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_reports_written)
+
+@event.listens_for(Session, 'after_bulk_update')
+@event.listens_for(Session, 'after_bulk_delete')
+def _mark_reports_bulk(context):
+    """Query.update()/delete() skip the mapper events above - flag for those too"""
+    if context.mapper.class_ in REPORT_MODELS:
+        _mark_reports_stale(context.session)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_reports(session):
+    """Bump after commit, so no request can re-cache the numbers as they were before it"""
+    if session.info.pop('invalidate_reports', False):
+        cache.set(REPORT_GENERATION_KEY, (cache.get(REPORT_GENERATION_KEY) or 0) + 1, timeout=0)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_reports_mark(session):
+    session.info.pop('invalidate_reports', None)
+
+# Built once so every request reuses the same statement (and its cached compilation)
+CALLSHEET_STATUS_COUNTS = (
+    select(CallsheetEntry.call_status, func.count())
+    .where(CallsheetEntry.callsheet_id.in_(bindparam('ids', expanding=True)))
+    .group_by(CallsheetEntry.call_status)
+)
+
+# Fields ?fields= may choose from on the paginated report lists
+INACTIVE_CUSTOMER_FIELDS = ('id', 'name', 'account_number', 'phone', 'email',
+                            'last_contact', 'days_since_contact', 'last_status')
+PENDING_CALLBACK_FIELDS = ('id', 'name', 'account_number', 'phone', 'callback_time', 'notes')
+
+def _count(model, *criteria):
+    """COUNT(*) through a Core select - skips ORM entity loading and the subquery Query.count() wraps"""
+    return db.session.execute(
+        select(func.count()).select_from(model).where(*criteria)
+    ).scalar()
+
+def _execute_concurrently(statements):
+    """
+    Run independent read-only selects side by side, each on its own pooled connection.
+    Takes {name: statement} and returns {name: rows}. REPORT_QUERY_WORKERS caps the
+    threads so one report can't drain the pool; 1 runs them in order on the session.
+    """
+    workers = min(len(statements), current_app.config.get('REPORT_QUERY_WORKERS', 4))
+    if workers <= 1:
+        return {name: db.session.execute(stmt).all() for name, stmt in statements.items()}
+    
+    engine = db.engine  # resolved here - worker threads have no app context
+    
+    def run(stmt):
+        with engine.connect() as conn:
+            return conn.execute(stmt).all()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(run, stmt) for name, stmt in statements.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def _parse_range(default_days=None):
+    """
+    Report window from ?start_date/&end_date (YYYY-MM-DD, end day included) as a
+    half-open (start, end) pair of datetimes. Without both args it is the current
+    month, or the last default_days up to now when given.
+    """
+    start_str = request.args.get('start_date')
+    end_str = request.args.get('end_date')
+    
+    if start_str and end_str:
+        start = datetime.strptime(start_str, '%Y-%m-%d')
+        end = datetime.strptime(end_str, '%Y-%m-%d') + timedelta(days=1)
+    elif default_days:
+        end = datetime.now()
+        start = end - timedelta(days=default_days)
+    else:
+        start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = start + relativedelta(months=1)
+    return start, end
+
+def _requested_fields(allowed):
+    """
+    Fields picked with ?fields=a,b in the order of allowed - unknown names are ignored,
+    and a missing or empty selection means every allowed field.
+    """
+    requested = {name.strip() for name in request.args.get('fields', '').split(',')}
+    return [name for name in allowed if name in requested] or list(allowed)
+
 @admin_bp.route('/')
 @login_required
 @admin_required
@@ -41,86 +183,65 @@ def reports():
 @admin_bp.route('/api/reports/summary')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_report_summary():
     """Get overall summary statistics"""
     
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-    else:
-        start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start_date.month == 12:
-            end_date = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date = start_date.replace(month=start_date.month + 1)
+    start_date, end_date_inclusive = _parse_range()
     
-    # Add 1 day to end_date to make it inclusive for datetime comparisons
-    end_date_inclusive = end_date + timedelta(days=1)
-    
-    # Total forms created
-    total_forms = Form.query.filter(
-        Form.date_created >= start_date,
-        Form.date_created < end_date_inclusive
-    ).count()
+    # The four aggregates are independent, so they run concurrently
+    results = _execute_concurrently({
+        # Forms by type, with completed counts - the totals are summed from the groups
+        'forms_by_type': select(
+            Form.type,
+            func.count(Form.id).label('total'),
+            func.sum(case((Form.is_completed == True, 1), else_=0)).label('completed')
+        ).where(
+            Form.date_created >= start_date,
+            Form.date_created < end_date_inclusive
+        ).group_by(Form.type),
+        # Standing orders - status counts and period creations in one pass
+        'standing_orders': select(
+            func.coalesce(func.sum(case((StandingOrder.status == 'active', 1), else_=0)), 0).label('active'),
+            func.coalesce(func.sum(case((StandingOrder.status == 'paused', 1), else_=0)), 0).label('paused'),
+            func.coalesce(func.sum(case((and_(
+                StandingOrder.created_at >= start_date,
+                StandingOrder.created_at < end_date_inclusive
+            ), 1), else_=0)), 0).label('created')
+        ),
+        # Stock transactions
+        'stock_transactions': select(func.count()).select_from(StockTransaction).where(
+            StockTransaction.transaction_date >= start_date,
+            StockTransaction.transaction_date < end_date_inclusive
+        ),
+        # Callsheet calls by status using CallHistory - the total is summed from the groups
+        'callsheet_by_status': select(
+            CallHistory.call_status,
+            func.count(CallHistory.id)
+        ).where(
+            CallHistory.call_date >= start_date,
+            CallHistory.call_date < end_date_inclusive
+        ).group_by(CallHistory.call_status),
+    })
     
-    completed_forms = Form.query.filter(
-        Form.date_created >= start_date,
-        Form.date_created < end_date_inclusive,
-        Form.is_completed == True
-    ).count()
-    
-    # Forms by type
-    forms_by_type = db.session.query(
-        Form.type,
-        func.count(Form.id)
-    ).filter(
-        Form.date_created >= start_date,
-        Form.date_created < end_date_inclusive
-    ).group_by(Form.type).all()
-    
-    # Standing orders
-    active_standing_orders = StandingOrder.query.filter_by(status='active').count()
-    paused_standing_orders = StandingOrder.query.filter_by(status='paused').count()
-    
-    standing_orders_created = StandingOrder.query.filter(
-        StandingOrder.created_at >= start_date,
-        StandingOrder.created_at < end_date_inclusive
-    ).count()
-    
-    # Stock transactions
-    stock_transactions = StockTransaction.query.filter(
-        StockTransaction.transaction_date >= start_date.date(),
-        StockTransaction.transaction_date < end_date.date()
-    ).count()
-
-    # Callsheet entries count and by_status using CallHistory
-    callsheet_entries = CallHistory.query.filter(
-        CallHistory.call_date >= start_date,
-        CallHistory.call_date < end_date_inclusive
-    ).count()
-
-    # Callsheet by status
-    callsheet_by_status = db.session.query(
-        CallHistory.call_status,
-        func.count(CallHistory.id)
-    ).filter(
-        CallHistory.call_date >= start_date,
-        CallHistory.call_date < end_date_inclusive
-    ).group_by(CallHistory.call_status).all()
-
-    return jsonify({
+    forms_by_type = results['forms_by_type']
+    total_forms = sum(row.total for row in forms_by_type)
+    completed_forms = sum(row.completed for row in forms_by_type)
+    standing_orders = results['standing_orders'][0]
+    stock_transactions = results['stock_transactions'][0][0]
+    callsheet_by_status = results['callsheet_by_status']
+    callsheet_entries = sum(c for _, c in callsheet_by_status)
+
+    return ojsonify({
         'forms': {
             'total': total_forms,
             'completed': completed_forms,
-            'by_type': [{'type': t, 'count': c} for t, c in forms_by_type]
+            'by_type': [{'type': row.type, 'count': row.total} for row in forms_by_type]
         },
         'standing_orders': {
-            'active': active_standing_orders,
-            'paused': paused_standing_orders,
-            'created_this_period': standing_orders_created
+            'active': standing_orders.active,
+            'paused': standing_orders.paused,
+            'created_this_period': standing_orders.created
         },
         'stock': {
             'total_transactions': stock_transactions
@@ -131,74 +252,124 @@ def get_report_summary():
         }
     })
 
-@admin_bp.route('/api/reports/daily-activity')
-@login_required
-@admin_required
-def get_daily_activity():
-    """Get daily activity breakdown for charts"""
-    
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        end_date = end_date + timedelta(days=1)
-    else:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-    
+def _daily_activity_counts(start_date, end_date):
+    """
+    Forms, stock transactions and callsheet calls per day in [start_date, end_date),
+    as three dicts keyed by 'YYYY-MM-DD'.
+    """
     # Forms created by day
-    forms_by_day = db.session.query(
+    forms_by_day = db.session.execute(select(
         func.date(Form.date_created).label('date'),
         func.count(Form.id).label('count')
-    ).filter(
+    ).where(
         Form.date_created >= start_date,
         Form.date_created < end_date
-    ).group_by(func.date(Form.date_created)).all()
+    ).group_by(func.date(Form.date_created))).all()
     
-    # Stock transactions by day
-    stock_by_day = db.session.query(
-        StockTransaction.transaction_date.label('date'),
+    # Stock transactions by day - transaction_date is a DateTime, so bucket by day like the others
+    stock_by_day = db.session.execute(select(
+        func.date(StockTransaction.transaction_date).label('date'),
         func.count(StockTransaction.id).label('count')
-    ).filter(
-        StockTransaction.transaction_date >= start_date.date(),
-        StockTransaction.transaction_date < end_date.date()
-    ).group_by(StockTransaction.transaction_date).all()
+    ).where(
+        StockTransaction.transaction_date >= start_date,
+        StockTransaction.transaction_date < end_date
+    ).group_by(func.date(StockTransaction.transaction_date))).all()
     
     # Callsheet updates by day - use updated_at
-    callsheet_by_day = db.session.query(
+    callsheet_by_day = db.session.execute(select(
         func.date(CallsheetEntry.updated_at).label('date'),
         func.count(CallsheetEntry.id).label('count')
-    ).filter(
+    ).where(
         CallsheetEntry.updated_at >= start_date,
         CallsheetEntry.updated_at < end_date,
         CallsheetEntry.call_status != 'not_called'
-    ).group_by(func.date(CallsheetEntry.updated_at)).all()
+    ).group_by(func.date(CallsheetEntry.updated_at))).all()
+    
+    # Key each series by 'YYYY-MM-DD' - func.date() gives a date on PostgreSQL but a string on SQLite
+    return (
+        {str(d.date): d.count for d in forms_by_day},
+        {str(d.date): d.count for d in stock_by_day},
+        {str(d.date): d.count for d in callsheet_by_day},
+    )
+
+def _rollup_daily_activity(first_day, last_day):
+    """Recompute daily_activity_stats rows for first_day..last_day (inclusive)"""
+    start = datetime.combine(first_day, datetime.min.time())
+    end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    forms_map, stock_map, callsheet_map = _daily_activity_counts(start, end)
+    
+    rows = []
+    for i in range((last_day - first_day).days + 1):
+        day = first_day + timedelta(days=i)
+        key = day.strftime('%Y-%m-%d')
+        rows.append({
+            'day': day,
+            'forms': forms_map.get(key, 0),
+            'stock': stock_map.get(key, 0),
+            'callsheets': callsheet_map.get(key, 0),
+            'refreshed_at': datetime.utcnow()
+        })
     
-    # Create a date range
-    date_range = []
-    current = start_date.date()
-    while current < end_date.date():
-        date_range.append(current)
-        current += timedelta(days=1)
+    # Replace the range in one transaction - portable across SQLite/PostgreSQL/MySQL
+    db.session.execute(delete(DailyActivityStats).where(
+        DailyActivityStats.day >= first_day,
+        DailyActivityStats.day <= last_day
+    ))
+    if rows:
+        db.session.execute(insert(DailyActivityStats.__table__), rows)
+    db.session.commit()
+    return len(rows)
+
+@admin_bp.cli.command('rollup-daily-activity')
+@click.option('--days', default=2, show_default=True, help='Number of closed days (ending yesterday) to recompute')
+def rollup_daily_activity_command(days):
+    """Refresh daily_activity_stats - run nightly from cron, or with a large --days to backfill"""
+    last_day = datetime.now().date() - timedelta(days=1)
+    count = _rollup_daily_activity(last_day - timedelta(days=days - 1), last_day)
+    click.echo(f'Rolled up {count} days of activity ending {last_day}')
+
+@admin_bp.route('/api/reports/daily-activity')
+@login_required
+@admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
+def get_daily_activity():
+    """Get daily activity breakdown for charts"""
     
-    # Build response with all dates
+    start_date, end_date = _parse_range(default_days=30)
+    
+    first_day = start_date.date()
+    days = [first_day + timedelta(days=i) for i in range((end_date.date() - first_day).days)]
+    
+    # Closed days come from the nightly rollup; today, and any day not rolled up yet, is counted live
+    rolled = {
+        row.day: row for row in db.session.execute(select(DailyActivityStats).where(
+            DailyActivityStats.day >= first_day,
+            DailyActivityStats.day < min(end_date.date(), datetime.now().date())
+        )).scalars()
+    }
+    missing = [day for day in days if day not in rolled]
+    forms_map, stock_map, callsheet_map = {}, {}, {}
+    if missing:
+        live_start = max(start_date, datetime.combine(missing[0], datetime.min.time()))
+        forms_map, stock_map, callsheet_map = _daily_activity_counts(live_start, end_date)
+    
+    # Build response with all dates - one dict lookup per day and source, zero-filled
     daily_data = []
-    for date_obj in date_range:
-        forms_count = next((d.count for d in forms_by_day if str(d.date) == str(date_obj)), 0)
-        stock_count = next((d.count for d in stock_by_day if d.date == date_obj), 0)
-        callsheet_count = next((d.count for d in callsheet_by_day if str(d.date) == str(date_obj)), 0)
-        
+    for day in days:
+        key = day.isoformat()
+        if day in rolled:
+            counts = (rolled[day].forms, rolled[day].stock, rolled[day].callsheets)
+        else:
+            counts = (forms_map.get(key, 0), stock_map.get(key, 0), callsheet_map.get(key, 0))
         daily_data.append({
-            'date': date_obj.strftime('%Y-%m-%d'),
-            'forms': forms_count,
-            'stock': stock_count,
-            'callsheets': callsheet_count,
-            'total': forms_count + stock_count + callsheet_count
+            'date': key,
+            'forms': counts[0],
+            'stock': counts[1],
+            'callsheets': counts[2],
+            'total': sum(counts)
         })
     
-    return jsonify(daily_data)
+    return ojsonify(daily_data)
 
 @admin_bp.route('/api/reports/user-activity')
 @login_required
@@ -206,63 +377,68 @@ def get_daily_activity():
 def get_user_activity():
     """Get activity breakdown by user"""
     
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
+    start_date, end_date_inclusive = _parse_range()
     
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        end_date_inclusive = end_date + timedelta(days=1)
-    else:
-        start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start_date.month == 12:
-            end_date_inclusive = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date_inclusive = start_date.replace(month=start_date.month + 1)
-    
-    # Get all users with their activity
-    users = User.query.all()
-    user_activity = []
-    
-    for user in users:
-        # Forms created by user
-        forms_created = Form.query.filter(
-            Form.date_created >= start_date,
-            Form.date_created < end_date_inclusive,
-            Form.user_id == user.id
-        ).count()
-        
-        # Callsheet calls made by user
-        calls_made = CallsheetEntry.query.filter(
-            CallsheetEntry.updated_at >= start_date,
-            CallsheetEntry.updated_at < end_date_inclusive,
-            CallsheetEntry.user_id == user.id,
-            CallsheetEntry.call_status != 'not_called'
-        ).count()
-        
-        # Stock transactions by user
-        stock_transactions = StockTransaction.query.filter(
-            StockTransaction.transaction_date >= start_date.date(),
-            StockTransaction.transaction_date <= end_date.date(),
-            StockTransaction.user_id == user.id
-        ).count()
-        
-        total_activity = forms_created + calls_made + stock_transactions
-        
-        if total_activity > 0:
-            user_activity.append({
-                'id': user.id,
-                'username': user.username,
-                'full_name': user.full_name,
-                'forms_created': forms_created,
-                'calls_made': calls_made,
-                'stock_transactions': stock_transactions,
-                'total_activity': total_activity
-            })
-    
-    user_activity.sort(key=lambda x: x['total_activity'], reverse=True)
+    # Per-user counts as three grouped subqueries, outer-joined onto User in one statement
+    forms_sub = select(
+        Form.user_id, func.count().label('cnt')
+    ).where(
+        Form.date_created >= start_date,
+        Form.date_created < end_date_inclusive
+    ).group_by(Form.user_id).subquery()
     
-    return jsonify(user_activity)
+    calls_sub = select(
+        CallsheetEntry.user_id, func.count().label('cnt')
+    ).where(
+        CallsheetEntry.updated_at >= start_date,
+        CallsheetEntry.updated_at < end_date_inclusive,
+        CallsheetEntry.call_status != 'not_called'
+    ).group_by(CallsheetEntry.user_id).subquery()
+    
+    stock_sub = select(
+        StockTransaction.created_by, func.count().label('cnt')
+    ).where(
+        StockTransaction.transaction_date >= start_date,
+        StockTransaction.transaction_date < end_date_inclusive
+    ).group_by(StockTransaction.created_by).subquery()
+    
+    forms_created = func.coalesce(forms_sub.c.cnt, 0)
+    calls_made = func.coalesce(calls_sub.c.cnt, 0)
+    stock_transactions = func.coalesce(stock_sub.c.cnt, 0)
+    total_activity = forms_created + calls_made + stock_transactions
+    
+    # Only users with some activity are reported, busiest first
+    rows = db.session.execute(select(
+        User.id,
+        User.username,
+        User.full_name,
+        forms_created.label('forms_created'),
+        calls_made.label('calls_made'),
+        stock_transactions.label('stock_transactions'),
+        total_activity.label('total_activity')
+    ).outerjoin(
+        forms_sub, forms_sub.c.user_id == User.id
+    ).outerjoin(
+        calls_sub, calls_sub.c.user_id == User.id
+    ).outerjoin(
+        stock_sub, stock_sub.c.created_by == User.id
+    ).where(
+        total_activity > 0
+    ).order_by(
+        desc(total_activity), User.id
+    )).all()
+    
+    user_activity = [{
+        'id': row.id,
+        'username': row.username,
+        'full_name': row.full_name,
+        'forms_created': row.forms_created,
+        'calls_made': row.calls_made,
+        'stock_transactions': row.stock_transactions,
+        'total_activity': row.total_activity
+    } for row in rows]
+    
+    return ojsonify(user_activity)
 
 @admin_bp.route('/api/reports/inactive-customers')
 @login_required
@@ -271,81 +447,98 @@ def get_inactive_customers():
     """Get customers who haven't been contacted recently"""
     
     days = request.args.get('days', default=30, type=int)
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    all_customers = Customer.query.all()
-    inactive_customers = []
-    
-    for customer in all_customers:
-        # Get most recent callsheet entry for this customer
-        last_entry = CallsheetEntry.query.filter(
-            CallsheetEntry.customer_id == customer.id,
+    limit = request.args.get('limit', default=100, type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    fields = _requested_fields(INACTIVE_CUSTOMER_FIELDS)
+    now = datetime.now()
+    cutoff_date = now - timedelta(days=days)
+    
+    # Most recent callsheet activity per customer
+    last_contact = select(
+        CallsheetEntry.customer_id,
+        func.max(CallsheetEntry.updated_at).label('last_contact')
+    ).where(
+        CallsheetEntry.updated_at.isnot(None)
+    ).group_by(CallsheetEntry.customer_id).subquery()
+    
+    # No entry at all, or last entry older than cutoff
+    inactive = or_(last_contact.c.last_contact.is_(None), last_contact.c.last_contact < cutoff_date)
+    
+    columns = [
+        Customer.id,
+        Customer.name,
+        Customer.account_number,
+        Customer.phone,
+        Customer.email,
+        last_contact.c.last_contact
+    ]
+    if 'last_status' in fields:
+        # Status of the latest entry - correlated, so it only runs for rows on this page
+        columns.append(select(CallsheetEntry.call_status).where(
+            CallsheetEntry.customer_id == Customer.id,
             CallsheetEntry.updated_at.isnot(None)
-        ).order_by(CallsheetEntry.updated_at.desc()).first()
-        
-        # If no entry or entry is older than cutoff, they're inactive
-        if not last_entry or last_entry.updated_at < cutoff_date:
-            days_since_contact = (datetime.now() - last_entry.updated_at).days if last_entry else 999
-            
-            inactive_customers.append({
-                'id': customer.id,
-                'name': customer.name,
-                'account_number': customer.account_number,
-                'phone': customer.phone,
-                'email': customer.email,
-                'last_contact': last_entry.updated_at.isoformat() if last_entry else None,
-                'days_since_contact': days_since_contact,
-                'last_status': last_entry.get_status_display() if last_entry else None
-            })
+        ).order_by(
+            CallsheetEntry.updated_at.desc(),
+            CallsheetEntry.id.desc()
+        ).limit(1).correlate(Customer).scalar_subquery().label('last_status'))
+    
+    total = db.session.execute(
+        select(func.count()).select_from(Customer).outerjoin(
+            last_contact, last_contact.c.customer_id == Customer.id
+        ).where(inactive)
+    ).scalar()
+    
+    # Oldest contact first
+    rows = db.session.execute(select(*columns).outerjoin(
+        last_contact, last_contact.c.customer_id == Customer.id
+    ).where(inactive).order_by(
+        last_contact.c.last_contact.asc().nulls_first(),
+        Customer.id
+    ).limit(limit).offset(offset)).all()
     
-    inactive_customers.sort(key=lambda x: x['days_since_contact'], reverse=True)
+    inactive_customers = []
+    for row in rows:
+        customer = {
+            'id': row.id,
+            'name': row.name,
+            'account_number': row.account_number,
+            'phone': row.phone,
+            'email': row.email,
+            'last_contact': row.last_contact,
+            'days_since_contact': (now - row.last_contact).days if row.last_contact else 999,
+            'last_status': CallsheetEntry.STATUS_DISPLAY.get(row.last_status, 'Not Called')
+                           if 'last_status' in fields and row.last_contact else None
+        }
+        inactive_customers.append({name: customer[name] for name in fields})
     
-    return jsonify(inactive_customers)
+    response = ojsonify(inactive_customers)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @admin_bp.route('/api/reports/callsheet-analytics')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_callsheet_analytics():
     """Get detailed callsheet analytics - USES CALLSHEET MONTH/YEAR"""
     
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-    else:
-        start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start_date.month == 12:
-            end_date = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date = start_date.replace(month=start_date.month + 1)
+    start_date, end_date = _parse_range()
     
-    # Build list of all month/year combinations in the date range
+    # Build list of all month/year combinations the date range touches
     months_in_range = []
-    current = start_date
-    while current <= end_date:
+    current = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while current < end_date:
         months_in_range.append((current.month, current.year))
-        # Move to next month
-        if current.month == 12:
-            current = current.replace(year=current.year + 1, month=1)
-        else:
-            current = current.replace(month=current.month + 1)
-    
-    # Get callsheets for all months in the range
-    callsheets = []
-    for month, year in months_in_range:
-        month_callsheets = Callsheet.query.filter(
-            Callsheet.year == year,
-            Callsheet.month == month,
-            Callsheet.is_active == True
-        ).all()
-        callsheets.extend(month_callsheets)
+        current += relativedelta(months=1)
     
-    callsheet_ids = [c.id for c in callsheets]
+    # Ids of active callsheets for every month in the range, in one query
+    callsheet_ids = db.session.execute(select(Callsheet.id).where(
+        Callsheet.is_active == True,
+        tuple_(Callsheet.month, Callsheet.year).in_(months_in_range)
+    )).scalars().all()
     
     if not callsheet_ids:
-        return jsonify({
+        return ojsonify({
             'order_success_rate': 0,
             'no_answer_rate': 0,
             'decline_rate': 0,
@@ -359,14 +552,60 @@ def get_callsheet_analytics():
             'pending_callbacks': []
         })
     
-    # Overall call status rates
-    total_calls = CallsheetEntry.query.filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status != 'not_called'
-    ).count()
+    # Per-status counters shared by the aggregate queries below
+    calls_count = func.count(CallsheetEntry.id)
+    orders_sum = func.sum(case((CallsheetEntry.call_status == 'ordered', 1), else_=0))
+    no_answer_sum = func.sum(case((CallsheetEntry.call_status == 'no_answer', 1), else_=0))
+    declined_sum = func.sum(case((CallsheetEntry.call_status == 'declined', 1), else_=0))
+    
+    # The aggregates only depend on callsheet_ids, so they run concurrently
+    results = _execute_concurrently({
+        # Overall call status rates - one GROUP BY instead of a COUNT per status
+        'status_counts': CALLSHEET_STATUS_COUNTS.params(ids=callsheet_ids),
+        # Performance by day of week - orders / calls across all callsheets for that day
+        'day_data': select(
+            Callsheet.day_of_week,
+            calls_count.label('total'),
+            orders_sum.label('ordered')
+        ).join(CallsheetEntry, CallsheetEntry.callsheet_id == Callsheet.id).where(
+            CallsheetEntry.callsheet_id.in_(callsheet_ids),
+            CallsheetEntry.call_status != 'not_called'
+        ).group_by(Callsheet.day_of_week),
+        # Staff performance - top 10 by success rate
+        'staff_data': select(
+            User.id,
+            User.username,
+            User.full_name,
+            calls_count.label('total'),
+            orders_sum.label('ordered')
+        ).join(CallsheetEntry, CallsheetEntry.user_id == User.id).where(
+            CallsheetEntry.callsheet_id.in_(callsheet_ids),
+            CallsheetEntry.call_status != 'not_called'
+        ).group_by(User.id).order_by(
+            (orders_sum * 1.0 / calls_count).desc()
+        ).limit(10),
+        # Per-customer call outcomes - one grouped query feeds the responsive,
+        # hard-to-reach and decliner lists, which are ranked in Python below
+        'customer_data': select(
+            Customer.id,
+            Customer.name,
+            Customer.account_number,
+            calls_count.label('total_calls'),
+            orders_sum.label('orders'),
+            no_answer_sum.label('no_answer'),
+            declined_sum.label('declined')
+        ).join(CallsheetEntry).where(
+            CallsheetEntry.callsheet_id.in_(callsheet_ids),
+            CallsheetEntry.call_status != 'not_called'
+        ).group_by(Customer.id).having(calls_count >= 2),
+    })
+    
+    status_counts = dict(results['status_counts'])
+    # NULL statuses never matched != 'not_called', so leave them out too
+    total_calls = sum(count for status, count in status_counts.items() if status not in ('not_called', None))
     
     if total_calls == 0:
-        return jsonify({
+        return ojsonify({
             'order_success_rate': 0,
             'no_answer_rate': 0,
             'decline_rate': 0,
@@ -380,25 +619,10 @@ def get_callsheet_analytics():
             'pending_callbacks': []
         })
     
-    ordered = CallsheetEntry.query.filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status == 'ordered'
-    ).count()
-    
-    no_answer = CallsheetEntry.query.filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status == 'no_answer'
-    ).count()
-    
-    declined = CallsheetEntry.query.filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status == 'declined'
-    ).count()
-    
-    callback = CallsheetEntry.query.filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status == 'callback'
-    ).count()
+    ordered = status_counts.get('ordered', 0)
+    no_answer = status_counts.get('no_answer', 0)
+    declined = status_counts.get('declined', 0)
+    callback = status_counts.get('callback', 0)
     
     order_success_rate = round((ordered / total_calls * 100) if total_calls > 0 else 0, 1)
     no_answer_rate = round((no_answer / total_calls * 100) if total_calls > 0 else 0, 1)
@@ -408,41 +632,14 @@ def get_callsheet_analytics():
     # Daily success rate trend - NOT APPLICABLE since callsheets are weekly
     daily_success_rate = []
     
-    # Performance by day of week
-    day_performance = {}
-    for callsheet in callsheets:
-        day_calls = CallsheetEntry.query.filter(
-            CallsheetEntry.callsheet_id == callsheet.id,
-            CallsheetEntry.call_status != 'not_called'
-        ).count()
-        
-        day_orders = CallsheetEntry.query.filter(
-            CallsheetEntry.callsheet_id == callsheet.id,
-            CallsheetEntry.call_status == 'ordered'
-        ).count()
-        
-        if day_calls > 0:
-            success_rate = round((day_orders / day_calls * 100), 1)
-            if callsheet.day_of_week in day_performance:
-                # Average if multiple callsheets for same day
-                day_performance[callsheet.day_of_week] = (day_performance[callsheet.day_of_week] + success_rate) / 2
-            else:
-                day_performance[callsheet.day_of_week] = success_rate
-    
-    # Staff performance
-    staff_data = db.session.query(
-        User.id,
-        User.username,
-        User.full_name,
-        func.count(CallsheetEntry.id).label('total'),
-        func.sum(case((CallsheetEntry.call_status == 'ordered', 1), else_=0)).label('ordered')
-    ).join(CallsheetEntry, CallsheetEntry.user_id == User.id).filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status != 'not_called'
-    ).group_by(User.id).all()
+    # Weighted by calls: total orders / total calls per weekday, not an average of sheet rates
+    day_performance = {
+        row.day_of_week: round(row.ordered / row.total * 100, 1)
+        for row in results['day_data'] if row.total
+    }
     
     staff_performance = []
-    for row in staff_data:
+    for row in results['staff_data']:
         success_rate = round((row.ordered / row.total * 100) if row.total > 0 else 0, 1)
         staff_performance.append({
             'id': row.id,
@@ -453,181 +650,130 @@ def get_callsheet_analytics():
             'success_rate': success_rate
         })
     
-    staff_performance.sort(key=lambda x: x['success_rate'], reverse=True)
-    
-    # Most responsive customers
-    responsive_data = db.session.query(
-        Customer.id,
-        Customer.name,
-        Customer.account_number,
-        func.count(CallsheetEntry.id).label('total_calls'),
-        func.sum(case((CallsheetEntry.call_status == 'ordered', 1), else_=0)).label('orders')
-    ).join(CallsheetEntry).filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status != 'not_called'
-    ).group_by(Customer.id).having(func.count(CallsheetEntry.id) >= 2).all()
-    
-    most_responsive = []
-    for row in responsive_data:
-        order_rate = round((row.orders / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-        if row.orders >= 1:
-            most_responsive.append({
-                'id': row.id,
-                'name': row.name,
-                'account_number': row.account_number,
-                'total_calls': row.total_calls,
-                'orders': row.orders,
-                'order_rate': order_rate
-            })
+    customer_data = results['customer_data']
     
-    most_responsive.sort(key=lambda x: x['order_rate'], reverse=True)
-    
-    # Hard to reach customers
-    hard_to_reach_data = db.session.query(
-        Customer.id,
-        Customer.name,
-        Customer.account_number,
-        func.count(CallsheetEntry.id).label('total_calls'),
-        func.sum(case((CallsheetEntry.call_status == 'no_answer', 1), else_=0)).label('no_answer')
-    ).join(CallsheetEntry).filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status != 'not_called'
-    ).group_by(Customer.id).having(func.count(CallsheetEntry.id) >= 2).all()
-    
-    hard_to_reach = []
-    for row in hard_to_reach_data:
-        no_answer_rate = round((row.no_answer / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-        if row.no_answer >= 2:
-            hard_to_reach.append({
-                'id': row.id,
-                'name': row.name,
-                'account_number': row.account_number,
-                'total_calls': row.total_calls,
-                'no_answer': row.no_answer,
-                'no_answer_rate': no_answer_rate
-            })
-    
-    hard_to_reach.sort(key=lambda x: x['no_answer_rate'], reverse=True)
-    
-    # Frequent decliners
-    decliner_data = db.session.query(
-        Customer.id,
-        Customer.name,
-        Customer.account_number,
-        func.count(CallsheetEntry.id).label('total_calls'),
-        func.sum(case((CallsheetEntry.call_status == 'declined', 1), else_=0)).label('declined')
-    ).join(CallsheetEntry).filter(
-        CallsheetEntry.callsheet_id.in_(callsheet_ids),
-        CallsheetEntry.call_status != 'not_called'
-    ).group_by(Customer.id).having(func.count(CallsheetEntry.id) >= 2).all()
-    
-    frequent_decliners = []
-    for row in decliner_data:
-        decline_rate = round((row.declined / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-        if row.declined >= 1:
-            frequent_decliners.append({
-                'id': row.id,
-                'name': row.name,
-                'account_number': row.account_number,
-                'total_calls': row.total_calls,
-                'declined': row.declined,
-                'decline_rate': decline_rate
-            })
-    
-    frequent_decliners.sort(key=lambda x: x['decline_rate'], reverse=True)
-    
-    # Pending callbacks - all current callbacks
-    pending_callbacks_entries = CallsheetEntry.query.filter(
-        CallsheetEntry.call_status == 'callback'
-    ).join(Customer).all()
-    
-    pending_callbacks = []
-    for entry in pending_callbacks_entries:
-        pending_callbacks.append({
-            'id': entry.customer.id,
-            'name': entry.customer.name,
-            'account_number': entry.customer.account_number,
-            'phone': entry.customer.phone,
-            'callback_time': entry.callback_time,
-            'notes': entry.customer.callsheet_notes
-        })
-    
-    return jsonify({
+    def _top_customers(rows, column, rate_key):
+        # Bounded heap over a generator - no filtered copy, no full sort
+        ranked = heapq.nlargest(10, rows, key=lambda row: getattr(row, column) / row.total_calls)
+        return [{
+            'id': row.id,
+            'name': row.name,
+            'account_number': row.account_number,
+            'total_calls': row.total_calls,
+            column: getattr(row, column),
+            rate_key: round(getattr(row, column) / row.total_calls * 100, 1)
+        } for row in ranked]
+    
+    # Most responsive customers - top 10 by order rate
+    most_responsive = _top_customers(
+        (row for row in customer_data if row.orders >= 1), 'orders', 'order_rate')
+    
+    # Hard to reach customers - top 10 by no-answer rate
+    hard_to_reach = _top_customers(
+        (row for row in customer_data if row.no_answer >= 2), 'no_answer', 'no_answer_rate')
+    
+    # Frequent decliners - top 10 by decline rate
+    frequent_decliners = _top_customers(
+        (row for row in customer_data if row.declined >= 1), 'declined', 'decline_rate')
+    
+    # Pending callbacks - current callbacks, paginated (?limit/&offset) and projected (?fields)
+    callbacks_limit = request.args.get('limit', default=100, type=int)
+    callbacks_offset = request.args.get('offset', default=0, type=int)
+    callback_fields = _requested_fields(PENDING_CALLBACK_FIELDS)
+    pending_callbacks_total = _count(CallsheetEntry, CallsheetEntry.call_status == 'callback')
+    # Plain column select read through .mappings() - no CallsheetEntry/Customer
+    # entities are hydrated just to copy six attributes into a dict
+    pending_callbacks_rows = db.session.execute(
+        select(
+            Customer.id,
+            Customer.name,
+            Customer.account_number,
+            Customer.phone,
+            CallsheetEntry.callback_time,
+            Customer.callsheet_notes.label('notes')
+        ).join(CallsheetEntry.customer).where(
+            CallsheetEntry.call_status == 'callback'
+        ).order_by(
+            Customer.name, CallsheetEntry.id
+        ).limit(callbacks_limit).offset(callbacks_offset)
+    ).mappings().all()
+    
+    pending_callbacks = [
+        {name: row[name] for name in callback_fields}
+        for row in pending_callbacks_rows
+    ]
+    
+    return ojsonify({
         'order_success_rate': order_success_rate,
         'no_answer_rate': no_answer_rate,
         'decline_rate': decline_rate,
         'callback_rate': callback_rate,
         'daily_success_rate': daily_success_rate,
         'day_performance': day_performance,
-        'staff_performance': staff_performance[:10],
-        'most_responsive': most_responsive[:10],
-        'hard_to_reach': hard_to_reach[:10],
-        'frequent_decliners': frequent_decliners[:10],
-        'pending_callbacks': pending_callbacks
+        'staff_performance': staff_performance,
+        'most_responsive': most_responsive,
+        'hard_to_reach': hard_to_reach,
+        'frequent_decliners': frequent_decliners,
+        'pending_callbacks': pending_callbacks,
+        'pending_callbacks_total': pending_callbacks_total
     })
 
 @admin_bp.route('/api/reports/additional-analytics')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_additional_analytics():
     """Get additional analytics data"""
     
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        end_date_inclusive = end_date + timedelta(days=1)
-    else:
-        start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start_date.month == 12:
-            end_date_inclusive = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date_inclusive = start_date.replace(month=start_date.month + 1)
+    start_date, end_date_inclusive = _parse_range()
     
     # Stock movement analytics
     try:
-        stock_in = StockTransaction.query.filter(
-            StockTransaction.transaction_date >= start_date.date(),
-            StockTransaction.transaction_date <= end_date.date(),
+        stock_in = _count(
+            StockTransaction,
+            StockTransaction.transaction_date >= start_date,
+            StockTransaction.transaction_date < end_date_inclusive,
             StockTransaction.transaction_type == 'in'
-        ).count()
+        )
         
-        stock_out = StockTransaction.query.filter(
-            StockTransaction.transaction_date >= start_date.date(),
-            StockTransaction.transaction_date <= end_date.date(),
+        stock_out = _count(
+            StockTransaction,
+            StockTransaction.transaction_date >= start_date,
+            StockTransaction.transaction_date < end_date_inclusive,
             StockTransaction.transaction_type == 'out'
-        ).count()
+        )
     except:
         stock_in = 0
         stock_out = 0
     
     # Standing order analytics
     try:
-        so_paused = StandingOrderLog.query.filter(
+        so_paused = _count(
+            StandingOrderLog,
             StandingOrderLog.created_at >= start_date,
             StandingOrderLog.created_at < end_date_inclusive,
             StandingOrderLog.action == 'paused'
-        ).count()
+        )
         
-        so_resumed = StandingOrderLog.query.filter(
+        so_resumed = _count(
+            StandingOrderLog,
             StandingOrderLog.created_at >= start_date,
             StandingOrderLog.created_at < end_date_inclusive,
             StandingOrderLog.action == 'resumed'
-        ).count()
+        )
         
-        so_ended = StandingOrderLog.query.filter(
+        so_ended = _count(
+            StandingOrderLog,
             StandingOrderLog.created_at >= start_date,
             StandingOrderLog.created_at < end_date_inclusive,
             StandingOrderLog.action == 'ended'
-        ).count()
+        )
     except:
         so_paused = 0
         so_resumed = 0
         so_ended = 0
     
-    return jsonify({
+    return ojsonify({
         'stock': {
             'in': stock_in,
             'out': stock_out,
@@ -643,30 +789,23 @@ def get_additional_analytics():
 @admin_bp.route('/api/reports/call-history-analytics')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_call_history_analytics():
     """Get comprehensive call history analytics using CallHistory model"""
 
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        end_date_inclusive = end_date + timedelta(days=1)
-    else:
-        # Default to last 30 days
-        end_date_inclusive = datetime.now()
-        start_date = end_date_inclusive - timedelta(days=30)
+    # Default to last 30 days
+    start_date, end_date_inclusive = _parse_range(default_days=30)
 
     try:
         # Overall call statistics from CallHistory
-        total_calls = CallHistory.query.filter(
+        total_calls = _count(
+            CallHistory,
             CallHistory.call_date >= start_date,
             CallHistory.call_date < end_date_inclusive
-        ).count()
+        )
 
         if total_calls == 0:
-            return jsonify({
+            return ojsonify({
                 'total_calls': 0,
                 'success_rate': 0,
                 'decline_rate': 0,
@@ -679,13 +818,13 @@ def get_call_history_analytics():
             })
 
         # Status breakdown
-        status_counts = db.session.query(
+        status_counts = db.session.execute(select(
             CallHistory.call_status,
             func.count(CallHistory.id).label('count')
-        ).filter(
+        ).where(
             CallHistory.call_date >= start_date,
             CallHistory.call_date < end_date_inclusive
-        ).group_by(CallHistory.call_status).all()
+        ).group_by(CallHistory.call_status)).all()
 
         status_breakdown = [{'status': s, 'count': c} for s, c in status_counts]
 
@@ -701,19 +840,19 @@ def get_call_history_analytics():
         callback_rate = round((callback_count / total_calls * 100) if total_calls > 0 else 0, 1)
 
         # Weekly trends
-        weekly_data = db.session.query(
+        weekly_data = db.session.execute(select(
             CallHistory.year,
             CallHistory.week_number,
             func.count(CallHistory.id).label('total'),
             func.sum(case((CallHistory.call_status == 'ordered', 1), else_=0)).label('ordered'),
             func.sum(case((CallHistory.call_status == 'declined', 1), else_=0)).label('declined'),
             func.sum(case((CallHistory.call_status == 'no_answer', 1), else_=0)).label('no_answer')
-        ).filter(
+        ).where(
             CallHistory.call_date >= start_date,
             CallHistory.call_date < end_date_inclusive
         ).group_by(CallHistory.year, CallHistory.week_number).order_by(
             CallHistory.year, CallHistory.week_number
-        ).all()
+        )).all()
 
         calls_by_week = []
         for row in weekly_data:
@@ -728,17 +867,19 @@ def get_call_history_analytics():
                 'success_rate': week_success_rate
             })
 
-        # Top callers performance
-        top_callers_data = db.session.query(
+        # Top callers performance - top 10 by call volume
+        top_callers_data = db.session.execute(select(
             User.id,
             User.username,
             User.full_name,
             func.count(CallHistory.id).label('total'),
             func.sum(case((CallHistory.call_status == 'ordered', 1), else_=0)).label('ordered')
-        ).join(CallHistory, CallHistory.called_by == User.id).filter(
+        ).join(CallHistory, CallHistory.called_by == User.id).where(
             CallHistory.call_date >= start_date,
             CallHistory.call_date < end_date_inclusive
-        ).group_by(User.id).all()
+        ).group_by(User.id).order_by(
+            func.count(CallHistory.id).desc()
+        ).limit(10)).all()
 
         top_callers = []
         for row in top_callers_data:
@@ -752,18 +893,16 @@ def get_call_history_analytics():
                 'success_rate': caller_success_rate
             })
 
-        top_callers.sort(key=lambda x: x['total_calls'], reverse=True)
-
         # Daily trends (last 14 days for chart)
         daily_start = end_date_inclusive - timedelta(days=14)
-        daily_data = db.session.query(
+        daily_data = db.session.execute(select(
             func.date(CallHistory.call_date).label('date'),
             func.count(CallHistory.id).label('total'),
             func.sum(case((CallHistory.call_status == 'ordered', 1), else_=0)).label('ordered')
-        ).filter(
+        ).where(
             CallHistory.call_date >= daily_start,
             CallHistory.call_date < end_date_inclusive
-        ).group_by(func.date(CallHistory.call_date)).order_by(func.date(CallHistory.call_date)).all()
+        ).group_by(func.date(CallHistory.call_date)).order_by(func.date(CallHistory.call_date))).all()
 
         daily_trends = []
         for row in daily_data:
@@ -775,7 +914,7 @@ def get_call_history_analytics():
                 'success_rate': daily_success_rate
             })
 
-        return jsonify({
+        return ojsonify({
             'total_calls': total_calls,
             'success_rate': success_rate,
             'decline_rate': decline_rate,
@@ -783,214 +922,480 @@ def get_call_history_analytics():
             'callback_rate': callback_rate,
             'calls_by_week': calls_by_week,
             'status_breakdown': status_breakdown,
-            'top_callers': top_callers[:10],
+            'top_callers': top_callers,
             'daily_trends': daily_trends
         })
 
     except Exception as e:
         logger.error(f"Error in call_history_analytics: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
-
+        return ojsonify({'error': str(e)}), 500
+
+
+def _call_outcome_columns(customer_id, call_date, status):
+    """Per-customer call outcome aggregates over call_history-shaped columns"""
+    return (
+        customer_id.label('customer_id'),
+        func.count().label('total'),
+        func.sum(case((status == 'ordered', 1), else_=0)).label('ordered'),
+        func.sum(case((status == 'declined', 1), else_=0)).label('declined'),
+        func.sum(case((status == 'no_answer', 1), else_=0)).label('no_answer'),
+        func.max(call_date).label('last_call')
+    )
+
+def _rollup_customer_calls(first_day, last_day):
+    """
+    Recompute customer_call_stats_daily rows for first_day..last_day (inclusive) and
+    extend the recorded coverage range when the days touch or overlap it.
+    """
+    start = datetime.combine(first_day, datetime.min.time())
+    end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    call_day = func.date(CallHistory.call_date)
+    
+    # Replace the range in one transaction, aggregating inside the database
+    db.session.execute(delete(CustomerCallStatsDaily).where(
+        CustomerCallStatsDaily.day >= first_day,
+        CustomerCallStatsDaily.day <= last_day
+    ))
+    outcomes = _call_outcome_columns(CallHistory.customer_id, CallHistory.call_date, CallHistory.call_status)
+    result = db.session.execute(insert(CustomerCallStatsDaily).from_select(
+        ['customer_id', 'day', 'total', 'ordered', 'declined', 'no_answer', 'last_call'],
+        select(outcomes[0], call_day, *outcomes[1:]).where(
+            CallHistory.call_date >= start,
+            CallHistory.call_date < end
+        ).group_by(CallHistory.customer_id, call_day)
+    ))
+    
+    # A disjoint range is left out of coverage - readers count those days live instead
+    coverage = db.session.get(CustomerCallStatsCoverage, 1)
+    if coverage is None:
+        db.session.add(CustomerCallStatsCoverage(id=1, first_day=first_day, last_day=last_day))
+    elif first_day <= coverage.last_day + timedelta(days=1) and last_day >= coverage.first_day - timedelta(days=1):
+        coverage.first_day = min(coverage.first_day, first_day)
+        coverage.last_day = max(coverage.last_day, last_day)
+    db.session.commit()
+    return result.rowcount
+
+@admin_bp.cli.command('rollup-customer-calls')
+@click.option('--days', default=2, show_default=True,
+              help='Number of already rolled-up days (ending yesterday) to recompute for late edits')
+def rollup_customer_calls_command(days):
+    """
+    Refresh customer_call_stats_daily - run nightly from cron. Rolls forward from the
+    last covered day, so missed runs are caught up on the next one.
+    """
+    last_day = datetime.now().date() - timedelta(days=1)
+    coverage = db.session.get(CustomerCallStatsCoverage, 1)
+    if coverage is None:
+        first_call = db.session.execute(select(func.min(CallHistory.call_date))).scalar()
+        first_day = min(first_call.date(), last_day) if first_call else last_day
+    else:
+        first_day = max(coverage.first_day,
+                        min(coverage.last_day + timedelta(days=1), last_day - timedelta(days=days - 1)))
+    if first_day > last_day:
+        click.echo(f'Customer call rollup already covers {last_day}')
+        return
+    count = _rollup_customer_calls(first_day, last_day)
+    click.echo(f'Rolled up {count} customer-days of calls from {first_day} to {last_day}')
+
+def _days_since(column):
+    """Whole calendar days from a datetime column to today, 0 when NULL, computed by the database"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        days = func.current_date() - cast(column, Date)
+    elif dialect == 'mysql':
+        days = func.datediff(func.curdate(), column)
+    else:
+        days = cast(func.julianday('now', 'localtime', 'start of day') - func.julianday(func.date(column)), Integer)
+    return func.coalesce(days, 0)
+
+def _customer_call_patterns(days_lookback, min_calls, *columns):
+    """
+    Select of per-customer call outcome totals (total_calls, ordered, declined,
+    no_answer, last_call_date, days_since_last_call) over the last days_lookback
+    days, keeping customers with at least min_calls calls. days_lookback=0 means
+    all time and reads the counters kept on Customer instead of grouping CallHistory.
+    """
+    if days_lookback <= 0:
+        return select(
+            *columns,
+            Customer.total_calls,
+            Customer.orders.label('ordered'),
+            Customer.declined,
+            Customer.no_answers.label('no_answer'),
+            Customer.last_call_date,
+            _days_since(Customer.last_call_date).label('days_since_last_call')
+        ).where(Customer.total_calls >= max(min_calls, 1))
+    
+    # Whole days from the cutoff: days inside the recorded coverage come from
+    # customer_call_stats_daily, any other day (today, a missed run, days before
+    # the first rollup) from call_history
+    cutoff_day = (datetime.now() - timedelta(days=days_lookback)).date()
+    live = CallHistory.call_date >= datetime.combine(cutoff_day, datetime.min.time())
+    parts = []
+    coverage = db.session.get(CustomerCallStatsCoverage, 1)
+    rolled_from = max(cutoff_day, coverage.first_day) if coverage else None
+    if coverage and coverage.last_day >= rolled_from:
+        parts.append(select(
+            CustomerCallStatsDaily.customer_id,
+            CustomerCallStatsDaily.total,
+            CustomerCallStatsDaily.ordered,
+            CustomerCallStatsDaily.declined,
+            CustomerCallStatsDaily.no_answer,
+            CustomerCallStatsDaily.last_call
+        ).where(
+            CustomerCallStatsDaily.day >= rolled_from,
+            CustomerCallStatsDaily.day <= coverage.last_day
+        ))
+        live = or_(
+            CallHistory.call_date >= datetime.combine(coverage.last_day + timedelta(days=1), datetime.min.time()),
+            and_(live, CallHistory.call_date < datetime.combine(rolled_from, datetime.min.time()))
+        )
+    parts.append(select(
+        *_call_outcome_columns(CallHistory.customer_id, CallHistory.call_date, CallHistory.call_status)
+    ).where(live).group_by(CallHistory.customer_id))
+    stats = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    
+    # Aggregate the slim stats rows first, then fetch Customer columns only for survivors
+    totals = select(
+        stats.c.customer_id,
+        func.sum(stats.c.total).label('total_calls'),
+        func.sum(stats.c.ordered).label('ordered'),
+        func.sum(stats.c.declined).label('declined'),
+        func.sum(stats.c.no_answer).label('no_answer'),
+        func.max(stats.c.last_call).label('last_call_date')
+    ).group_by(stats.c.customer_id).having(
+        func.sum(stats.c.total) >= min_calls
+    ).cte('call_totals')
+    
+    return select(
+        *columns,
+        totals.c.total_calls,
+        totals.c.ordered,
+        totals.c.declined,
+        totals.c.no_answer,
+        totals.c.last_call_date,
+        _days_since(totals.c.last_call_date).label('days_since_last_call')
+    ).join(totals, totals.c.customer_id == Customer.id)
+
+CALL_PATTERN_COUNTS = ['total_calls', 'ordered', 'declined', 'no_answer']
+
+def _call_pattern_frame(result):
+    """
+    Rows from _customer_call_patterns as a DataFrame, with decline/no-answer/order
+    rates (percent, 1 dp) computed column-wise.
+    """
+    df = pd.DataFrame(result.all(), columns=list(result.keys()))
+    df[CALL_PATTERN_COUNTS] = df[CALL_PATTERN_COUNTS].fillna(0).astype(int)
+    calls = df['total_calls'].where(df['total_calls'] > 0)
+    for rate, count in (('decline_rate', 'declined'), ('no_answer_rate', 'no_answer'), ('order_rate', 'ordered')):
+        df[rate] = (df[count] / calls * 100).fillna(0).round(1)
+    return df
+
+def _frame_records(df):
+    """DataFrame rows as JSON-ready dicts - NaN/NaT become None, numpy scalars Python ones"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
 
 @admin_bp.route('/api/reports/problem-customers')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_problem_customers():
     """Identify customers with high decline/no-answer rates that need attention"""
 
     # Get parameters
     min_calls = request.args.get('min_calls', default=3, type=int)  # Minimum calls to be considered
-    days_lookback = request.args.get('days', default=60, type=int)  # How far back to look
+    days_lookback = request.args.get('days', default=60, type=int)  # How far back to look (0 = all time)
     decline_threshold = request.args.get('decline_threshold', default=50, type=int)  # % decline rate
     no_answer_threshold = request.args.get('no_answer_threshold', default=60, type=int)  # % no answer rate
-
-    cutoff_date = datetime.now() - timedelta(days=days_lookback)
+    limit = request.args.get('limit', default=100, type=int)  # Page of the sorted list (?limit/&offset)
+    offset = request.args.get('offset', default=0, type=int)
 
     try:
         # Get customer call patterns from CallHistory
-        customer_patterns = db.session.query(
+        df = _call_pattern_frame(db.session.execute(_customer_call_patterns(
+            days_lookback,
+            min_calls,
             Customer.id,
             Customer.name,
             Customer.account_number,
             Customer.phone,
             Customer.email,
-            Customer.contact_name,
-            func.count(CallHistory.id).label('total_calls'),
-            func.sum(case((CallHistory.call_status == 'ordered', 1), else_=0)).label('ordered'),
-            func.sum(case((CallHistory.call_status == 'declined', 1), else_=0)).label('declined'),
-            func.sum(case((CallHistory.call_status == 'no_answer', 1), else_=0)).label('no_answer'),
-            func.max(CallHistory.call_date).label('last_call_date')
-        ).join(CallHistory).filter(
-            CallHistory.call_date >= cutoff_date
-        ).group_by(Customer.id).having(
-            func.count(CallHistory.id) >= min_calls
-        ).all()
-
-        problem_customers = []
-        for row in customer_patterns:
-            decline_rate = round((row.declined / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-            no_answer_rate = round((row.no_answer / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-            order_rate = round((row.ordered / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-
-            # Determine problem type and recommendation
-            problem_type = None
-            recommendation = None
-            priority = 0
-
-            if decline_rate >= decline_threshold:
-                problem_type = 'High Decline Rate'
-                recommendation = 'Sales rep visit recommended - customer consistently declines phone orders'
-                priority = 3  # High priority
-            elif no_answer_rate >= no_answer_threshold:
-                problem_type = 'Hard to Reach'
-                recommendation = 'Update contact information or try different call times'
-                priority = 2  # Medium priority
-            elif row.ordered == 0 and row.total_calls >= 5:
-                problem_type = 'Never Ordered'
-                recommendation = 'Sales rep visit needed - no phone success after multiple attempts'
-                priority = 3  # High priority
-
-            if problem_type:
-                problem_customers.append({
-                    'id': row.id,
-                    'name': row.name,
-                    'account_number': row.account_number,
-                    'phone': row.phone,
-                    'email': row.email,
-                    'contact_name': row.contact_name,
-                    'total_calls': row.total_calls,
-                    'ordered': row.ordered,
-                    'declined': row.declined,
-                    'no_answer': row.no_answer,
-                    'decline_rate': decline_rate,
-                    'no_answer_rate': no_answer_rate,
-                    'order_rate': order_rate,
-                    'last_call_date': row.last_call_date.isoformat() if row.last_call_date else None,
-                    'problem_type': problem_type,
-                    'recommendation': recommendation,
-                    'priority': priority
-                })
+            Customer.contact_name
+        )))
+
+        # Determine problem type and recommendation - first matching rule wins
+        high_decline = df['decline_rate'] >= decline_threshold
+        hard_to_reach = ~high_decline & (df['no_answer_rate'] >= no_answer_threshold)
+        never_ordered = ~high_decline & ~hard_to_reach & (df['ordered'] == 0) & (df['total_calls'] >= 5)
+        rules = [high_decline, hard_to_reach, never_ordered]
+        df['problem_type'] = np.select(rules, ['High Decline Rate', 'Hard to Reach', 'Never Ordered'], default='')
+        df['recommendation'] = np.select(rules, [
+            'Sales rep visit recommended - customer consistently declines phone orders',
+            'Update contact information or try different call times',
+            'Sales rep visit needed - no phone success after multiple attempts'
+        ], default='')
+        df['priority'] = np.select(rules, [3, 2, 3], default=0)  # 3 = high, 2 = medium
 
         # Sort by priority (high to low) then by decline rate
-        problem_customers.sort(key=lambda x: (x['priority'], x['decline_rate']), reverse=True)
-
-        return jsonify({
-            'total_problem_customers': len(problem_customers),
-            'high_priority': len([c for c in problem_customers if c['priority'] == 3]),
-            'medium_priority': len([c for c in problem_customers if c['priority'] == 2]),
+        df = df[df['priority'] > 0].sort_values(['priority', 'decline_rate'], ascending=False, kind='stable')
+        # Only the requested page becomes dicts/JSON - totals below still cover every customer
+        problem_customers = _frame_records(df.iloc[offset:offset + limit][[
+            'id', 'name', 'account_number', 'phone', 'email', 'contact_name',
+            'total_calls', 'ordered', 'declined', 'no_answer',
+            'decline_rate', 'no_answer_rate', 'order_rate', 'last_call_date',
+            'problem_type', 'recommendation', 'priority'
+        ]])
+
+        # Tally priorities in one pass
+        priority_counts = df['priority'].value_counts()
+
+        return ojsonify({
+            'total_problem_customers': len(df),
+            'high_priority': int(priority_counts.get(3, 0)),
+            'medium_priority': int(priority_counts.get(2, 0)),
             'customers': problem_customers
         })
 
     except Exception as e:
         logger.error(f"Error in problem_customers: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 
 @admin_bp.route('/api/reports/sales-rep-needed')
 @login_required
 @admin_required
+@cache.cached(timeout=REPORT_CACHE_TIMEOUT, key_prefix=_report_cache_key, response_filter=_cacheable)
 def get_sales_rep_needed():
     """Get list of customers who need a sales rep visit with detailed reasoning"""
 
-    days_lookback = request.args.get('days', default=90, type=int)
-    cutoff_date = datetime.now() - timedelta(days=days_lookback)
+    days_lookback = request.args.get('days', default=90, type=int)  # 0 = all time
+    limit = request.args.get('limit', default=100, type=int)  # Page of the sorted list (?limit/&offset)
+    offset = request.args.get('offset', default=0, type=int)
 
     try:
-        # Get all customers with their call history
-        customer_data = db.session.query(
+        # Customers with their call history - need at least 2 calls to make a determination
+        df = _call_pattern_frame(db.session.execute(_customer_call_patterns(
+            days_lookback,
+            2,
             Customer.id,
             Customer.name,
             Customer.account_number,
             Customer.phone,
             Customer.email,
             Customer.contact_name,
-            Customer.address,
-            func.count(CallHistory.id).label('total_calls'),
-            func.sum(case((CallHistory.call_status == 'ordered', 1), else_=0)).label('ordered'),
-            func.sum(case((CallHistory.call_status == 'declined', 1), else_=0)).label('declined'),
-            func.sum(case((CallHistory.call_status == 'no_answer', 1), else_=0)).label('no_answer'),
-            func.max(CallHistory.call_date).label('last_call_date')
-        ).join(CallHistory).filter(
-            CallHistory.call_date >= cutoff_date
-        ).group_by(Customer.id).all()
-
-        sales_rep_needed = []
-        for row in customer_data:
-            if row.total_calls < 2:
-                continue  # Need at least 2 calls to make a determination
-
-            decline_rate = round((row.declined / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-            order_rate = round((row.ordered / row.total_calls * 100) if row.total_calls > 0 else 0, 1)
-
-            reasons = []
-            score = 0  # Priority score (higher = more urgent)
-
-            # Criteria for needing sales rep visit
+            Customer.address
+        )))
+        decline_text = df['decline_rate'].astype(str)
 
+        # Criteria for needing sales rep visit: (applies, priority points, reason)
+        criteria = [
             # 1. High decline rate (50%+)
-            if decline_rate >= 50 and row.total_calls >= 3:
-                reasons.append(f'{decline_rate}% decline rate - customer prefers not to order by phone')
-                score += 10
-
+            ((df['decline_rate'] >= 50) & (df['total_calls'] >= 3), 10,
+             decline_text + '% decline rate - customer prefers not to order by phone'),
             # 2. Never ordered despite multiple calls
-            if row.ordered == 0 and row.total_calls >= 5:
-                reasons.append(f'{row.total_calls} calls with no orders - phone approach ineffective')
-                score += 15
-
+            ((df['ordered'] == 0) & (df['total_calls'] >= 5), 15,
+             df['total_calls'].astype(str) + ' calls with no orders - phone approach ineffective'),
             # 3. Very high decline rate (75%+)
-            if decline_rate >= 75:
-                reasons.append(f'{decline_rate}% decline rate - strong resistance to phone orders')
-                score += 5
-
+            (df['decline_rate'] >= 75, 5,
+             decline_text + '% decline rate - strong resistance to phone orders'),
             # 4. Mix of declines and no answers (difficult customer)
-            if row.declined >= 2 and row.no_answer >= 2:
-                reasons.append('Mixed decline and no-answer pattern - inconsistent engagement')
-                score += 3
-
+            ((df['declined'] >= 2) & (df['no_answer'] >= 2), 3,
+             pd.Series('Mixed decline and no-answer pattern - inconsistent engagement', index=df.index)),
             # 5. Low order rate with many attempts
-            if order_rate < 20 and row.total_calls >= 4:
-                reasons.append(f'Only {order_rate}% order rate after {row.total_calls} attempts')
-                score += 8
-
-            # If there are reasons, add to the list
-            if reasons:
-                days_since_last_call = (datetime.now() - row.last_call_date).days if row.last_call_date else 0
-
-                sales_rep_needed.append({
-                    'id': row.id,
-                    'name': row.name,
-                    'account_number': row.account_number,
-                    'phone': row.phone,
-                    'email': row.email,
-                    'contact_name': row.contact_name,
-                    'address': row.address,
-                    'total_calls': row.total_calls,
-                    'ordered': row.ordered,
-                    'declined': row.declined,
-                    'no_answer': row.no_answer,
-                    'decline_rate': decline_rate,
-                    'order_rate': order_rate,
-                    'last_call_date': row.last_call_date.isoformat() if row.last_call_date else None,
-                    'days_since_last_call': days_since_last_call,
-                    'reasons': reasons,
-                    'priority_score': score
-                })
-
-        # Sort by priority score (highest first)
-        sales_rep_needed.sort(key=lambda x: x['priority_score'], reverse=True)
-
-        return jsonify({
-            'total_customers': len(sales_rep_needed),
-            'high_priority': len([c for c in sales_rep_needed if c['priority_score'] >= 15]),
-            'medium_priority': len([c for c in sales_rep_needed if 8 <= c['priority_score'] < 15]),
-            'low_priority': len([c for c in sales_rep_needed if c['priority_score'] < 8]),
+            ((df['order_rate'] < 20) & (df['total_calls'] >= 4), 8,
+             'Only ' + df['order_rate'].astype(str) + '% order rate after ' + df['total_calls'].astype(str) + ' attempts'),
+        ]
+
+        # Priority score (higher = more urgent)
+        df['priority_score'] = sum(np.where(applies, points, 0) for applies, points, _ in criteria)
+
+        # Customers with any reason, highest priority score first
+        df = df[df['priority_score'] > 0].sort_values('priority_score', ascending=False, kind='stable')
+
+        # Only the requested page gets its reasons and becomes dicts/JSON -
+        # the totals below still cover every customer
+        page = df.iloc[offset:offset + limit].copy()
+        reason_columns = [reason.where(applies).reindex(page.index) for applies, _, reason in criteria]
+        page['reasons'] = [[reason for reason in row if isinstance(reason, str)] for row in zip(*reason_columns)]
+        sales_rep_needed = _frame_records(page[[
+            'id', 'name', 'account_number', 'phone', 'email', 'contact_name', 'address',
+            'total_calls', 'ordered', 'declined', 'no_answer',
+            'decline_rate', 'order_rate', 'last_call_date', 'days_since_last_call',
+            'reasons', 'priority_score'
+        ]])
+
+        # Tally priority bands in one pass - high 15+, medium 8-14, low below 8
+        bands = pd.Series(np.select(
+            [df['priority_score'] >= 15, df['priority_score'] >= 8], ['high', 'medium'], default='low'
+        )).value_counts()
+
+        return ojsonify({
+            'total_customers': len(df),
+            'high_priority': int(bands.get('high', 0)),
+            'medium_priority': int(bands.get('medium', 0)),
+            'low_priority': int(bands.get('low', 0)),
             'customers': sales_rep_needed
         })
 
     except Exception as e:
         logger.error(f"Error in sales_rep_needed: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
+
+
+# Returns report payloads by date range, kept a day and refreshed off the request thread;
+# a refresh that hasn't finished within RETURNS_REFRESH_TIMEOUT may be started again
+RETURNS_REPORT_TIMEOUT = 86400
+RETURNS_REFRESH_TIMEOUT = 600
+# Cache types that live inside one process - anything a CLI command stores there is lost on exit
+PROCESS_LOCAL_CACHE_TYPES = ('simple', 'SimpleCache', 'null', 'NullCache')
+
+def _build_returns_report(start_date, end_date):
+    """Returns analytics payload for [start_date, end_date) - most used reasons and credit/uplift breakdown"""
+    # One row per returns form from the columns copied out of Form.data on write -
+    # the aggregates group on these, so nothing parses JSON at read time
+    form_type = func.lower(func.coalesce(Form.form_kind, ''))
+    returns = select(
+        cast(func.date(Form.date_created), String).label('date'),
+        func.coalesce(Form.reason, 'unknown').label('reason'),
+        # Credit/uplift is implied by the form_type field; anything else is 'unknown'
+        case(
+            (form_type.like('%credit%'), 'credit'),
+            (form_type.like('%uplift%'), 'uplift'),
+            else_='unknown'
+        ).label('kind'),
+        func.coalesce(Form.customer_account, '').label('account'),
+        func.coalesce(Form.customer_name, 'Unknown').label('name')
+    ).where(
+        Form.type == 'returns',
+        Form.date_created >= start_date,
+        Form.date_created < end_date
+    ).cte('returns')
+    count = func.count().label('count')
+    top_customers = select(returns.c.account, returns.c.name, count).group_by(
+        returns.c.account, returns.c.name
+    ).order_by(desc('count')).limit(10).subquery()
+
+    # Every breakdown in one round trip, as (breakdown, key, label, count) rows.
+    # The CTE is referenced four times, so PostgreSQL scans form once for all of them.
+    def breakdown(name, column):
+        return select(
+            literal(name).label('breakdown'), column.label('key'), null().label('label'), count
+        ).group_by(column)
+
+    rows = db.session.execute(union_all(
+        breakdown('day', returns.c.date),
+        breakdown('reason', returns.c.reason),
+        breakdown('kind', returns.c.kind),
+        select(literal('customer'), top_customers.c.account, top_customers.c.name, top_customers.c.count)
+    ).order_by(desc('count')))
+
+    results = defaultdict(list)
+    for row in rows:
+        results[row.breakdown].append(row)
+
+    total_returns = sum(row.count for row in results['day'])
+    if total_returns == 0:
+        return {
+            'total_returns': 0,
+            'reasons': [],
+            'credit_vs_uplift': {'credit': 0, 'uplift': 0},
+            'returns_by_day': [],
+            'top_customers': []
+        }
 
+    # Format reason counts with readable names
+    reason_display_names = {
+        'damaged': 'Damaged Product',
+        'wrong': 'Wrong Product Sent',
+        'overstock': 'Overstocked',
+        'other': 'Other',
+        'unknown': 'Unknown'
+    }
+
+    reasons = [
+        {
+            'reason': reason_display_names.get(row.key, row.key.title()),
+            'count': row.count,
+            'percentage': round((row.count / total_returns * 100), 1)
+        }
+        for row in results['reason']
+    ]
+
+    kind_counts = {row.key: row.count for row in results['kind']}
+    credit_uplift_counts = {
+        'credit': kind_counts.get('credit', 0),
+        'uplift': kind_counts.get('uplift', 0),
+        'unknown': kind_counts.get('unknown', 0)
+    }
+
+    # Trend chart wants days in order - ISO date strings sort chronologically
+    returns_by_day = [
+        {'date': row.key, 'count': row.count}
+        for row in sorted(results['day'], key=attrgetter('key'))
+    ]
+
+    top_customers = [
+        {
+            'customer': f"{row.key} - {row.label}",
+            'return_count': row.count
+        }
+        for row in results['customer']
+    ]
+
+    return {
+        'total_returns': total_returns,
+        'reasons': reasons,
+        'credit_vs_uplift': credit_uplift_counts,
+        'returns_by_day': returns_by_day,
+        'top_customers': top_customers
+    }
+
+def _returns_report_key(start_date, end_date):
+    return f"reports:returns:{start_date:%Y-%m-%d}:{end_date:%Y-%m-%d}"
+
+def _refresh_returns_report(start_date, end_date):
+    """Rebuild and store one returns payload, tagged with the report generation it was built from"""
+    key = _returns_report_key(start_date, end_date)
+    generation = cache.get(REPORT_GENERATION_KEY) or 0
+    try:
+        payload = _build_returns_report(start_date, end_date)
+        cache.set(key, (generation, payload), timeout=RETURNS_REPORT_TIMEOUT)
+        return payload
+    finally:
+        cache.delete(f'{key}:refreshing')
+
+def _returns_report(start_date, end_date):
+    """
+    Cached returns payload. A payload older than the current report generation is
+    still served, and one background rebuild is started for it; only a range never
+    built before is computed on the request thread.
+    """
+    key = _returns_report_key(start_date, end_date)
+    cached = cache.get(key)
+    if cached is None:
+        return _refresh_returns_report(start_date, end_date)
+    generation, payload = cached
+    if generation != (cache.get(REPORT_GENERATION_KEY) or 0) \
+            and cache.add(f'{key}:refreshing', 1, timeout=RETURNS_REFRESH_TIMEOUT):
+        run_in_background(_refresh_returns_report, start_date, end_date)
+    return payload
+
+@admin_bp.cli.command('warm-returns-report')
+def warm_returns_report_command():
+    """
+    Prebuild the returns report for this month and last - run nightly from cron.
+    Needs a cache shared with the web workers (CACHE_TYPE, e.g. RedisCache).
+    """
+    cache_type = current_app.config.get('CACHE_TYPE') or 'null'
+    if cache_type in PROCESS_LOCAL_CACHE_TYPES:
+        raise click.ClickException(
+            f'CACHE_TYPE {cache_type} is local to this process, so the web workers would never see '
+            'the warmed reports - configure a shared backend such as RedisCache'
+        )
+    this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for start in (this_month - relativedelta(months=1), this_month):
+        payload = _refresh_returns_report(start, start + relativedelta(months=1))
+        click.echo(f"Built returns report for {start:%B %Y}: {payload['total_returns']} returns")
 
 @admin_bp.route('/api/reports/returns-analytics')
 @login_required
@@ -998,127 +1403,234 @@ def get_sales_rep_needed():
 def get_returns_analytics():
     """Get returns form analytics - most used reasons and credit/uplift breakdown"""
 
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        end_date_inclusive = end_date + timedelta(days=1)
-    else:
-        start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start_date.month == 12:
-            end_date_inclusive = start_date.replace(year=start_date.year + 1, month=1)
-        else:
-            end_date_inclusive = start_date.replace(month=start_date.month + 1)
+    start_date, end_date_inclusive = _parse_range()
 
     try:
-        import json
-
-        # Get all returns forms in the date range
-        returns_forms = Form.query.filter(
-            Form.type == 'returns',
-            Form.date_created >= start_date,
-            Form.date_created < end_date_inclusive
-        ).all()
-
-        if len(returns_forms) == 0:
-            return jsonify({
-                'total_returns': 0,
-                'reasons': [],
-                'credit_vs_uplift': {'credit': 0, 'uplift': 0},
-                'returns_by_day': [],
-                'top_customers': []
-            })
-
-        # Parse form data and collect statistics
-        reason_counts = {}
-        credit_uplift_counts = {'credit': 0, 'uplift': 0, 'unknown': 0}
-        customer_return_counts = {}
-
-        for form in returns_forms:
-            try:
-                form_data = json.loads(form.data)
-
-                # Count reasons
-                reason = form_data.get('reason', 'unknown')
-                reason_counts[reason] = reason_counts.get(reason, 0) + 1
-
-                # Check for credit/uplift indicator (if exists in form data)
-                # Note: Based on the form structure, credit/uplift might be implied by the form type
-                # or could be a separate field. For now, we'll mark them as 'unknown' unless specified
-                form_type = form_data.get('form_type', 'unknown')
-                if 'credit' in form_type.lower():
-                    credit_uplift_counts['credit'] += 1
-                elif 'uplift' in form_type.lower():
-                    credit_uplift_counts['uplift'] += 1
-                else:
-                    credit_uplift_counts['unknown'] += 1
-
-                # Count returns by customer
-                customer_name = form_data.get('customer_name', 'Unknown')
-                customer_account = form_data.get('customer_account', '')
-                customer_key = f"{customer_account} - {customer_name}"
-                customer_return_counts[customer_key] = customer_return_counts.get(customer_key, 0) + 1
-
-            except json.JSONDecodeError:
-                logger.warning(f"Could not parse form data for form {form.id}")
-                continue
-
-        # Format reason counts with readable names
-        reason_display_names = {
-            'damaged': 'Damaged Product',
-            'wrong': 'Wrong Product Sent',
-            'overstock': 'Overstocked',
-            'other': 'Other',
-            'unknown': 'Unknown'
-        }
-
-        reasons = [
-            {
-                'reason': reason_display_names.get(reason, reason.title()),
-                'count': count,
-                'percentage': round((count / len(returns_forms) * 100), 1)
-            }
-            for reason, count in sorted(reason_counts.items(), key=lambda x: x[1], reverse=True)
-        ]
-
-        # Returns by day for trend chart
-        returns_by_day_data = db.session.query(
-            func.date(Form.date_created).label('date'),
-            func.count(Form.id).label('count')
-        ).filter(
-            Form.type == 'returns',
-            Form.date_created >= start_date,
-            Form.date_created < end_date_inclusive
-        ).group_by(func.date(Form.date_created)).order_by(func.date(Form.date_created)).all()
-
-        returns_by_day = [
-            {'date': str(row.date), 'count': row.count}
-            for row in returns_by_day_data
-        ]
-
-        # Top customers with most returns
-        top_customers = [
-            {
-                'customer': customer,
-                'return_count': count
-            }
-            for customer, count in sorted(customer_return_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        ]
-
-        return jsonify({
-            'total_returns': len(returns_forms),
-            'reasons': reasons,
-            'credit_vs_uplift': credit_uplift_counts,
-            'returns_by_day': returns_by_day,
-            'top_customers': top_customers
-        })
+        return ojsonify(_returns_report(start_date, end_date_inclusive))
 
     except Exception as e:
         logger.error(f"Error in returns_analytics: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
-
+        return ojsonify({'error': str(e)}), 500
+
+
+# Keep IN (...) lists under SQLite's 999 bound-parameter limit
+IN_CLAUSE_CHUNK_SIZE = 900
+
+CUSTOMER_IMPORT_COLUMNS = ['account_number', 'name', 'contact_name', 'phone', 'email', 'address']
+
+# Rows read per DataFrame chunk on customer imports - bounds memory on large CSVs
+CUSTOMER_IMPORT_CHUNK_SIZE = 5000
+
+def _clean_customer_frame(df):
+    """
+    Vectorized cleanup of an import chunk: keep the known customer columns, strip
+    every cell, turn blanks/NaN into None, and drop rows missing an account number
+    or name. Returns (df, dropped).
+    """
+    df = df[[c for c in CUSTOMER_IMPORT_COLUMNS if c in df.columns]].copy()
+    for col in df.columns:
+        values = df[col].astype('string').str.strip()
+        values = values.mask(values == '')
+        df[col] = values.astype(object).where(values.notna(), None)
+    total_rows = len(df)
+    df = df.dropna(subset=['account_number', 'name'])
+    return df, total_rows - len(df)
+
+def _import_batch_size():
+    """Rows per commit for imports - IMPORT_BATCH_SIZE, else ~1000 on PostgreSQL and ~10000 elsewhere"""
+    configured = current_app.config.get('IMPORT_BATCH_SIZE')
+    if configured:
+        return configured
+    return 1000 if db.engine.dialect.name == 'postgresql' else 10000
+
+def _commit_batch():
+    """Commit the current import batch and drop loaded objects so the session stays bounded"""
+    db.session.flush()
+    db.session.commit()
+    db.session.expunge_all()
+
+@contextmanager
+def _import_session():
+    """
+    Tune the session for an import: no autoflush before each lookup and no
+    expiring on commit. Only this thread's session is changed - SQL logging is
+    left alone, since the engine and its logger are shared with every request.
+    """
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        with session.no_autoflush:
+            yield session
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+def _supports_copy():
+    """COPY FROM STDIN needs PostgreSQL through psycopg2's copy_expert"""
+    return db.engine.dialect.name == 'postgresql' and db.engine.dialect.driver == 'psycopg2'
+
+def _copy_from_buffer(table, columns, buf):
+    """Stream a CSV buffer into table with COPY FROM STDIN on the session's connection"""
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buf
+        )
+    finally:
+        cursor.close()
+
+def _copy_upsert(table, key, columns, buf, keep_existing=()):
+    """
+    Upsert a headerless CSV buffer on PostgreSQL: COPY it into a temp staging
+    table, then merge with a single INSERT ... ON CONFLICT (key) DO UPDATE.
+
+    Columns in keep_existing only overwrite the stored value when the file
+    has one, and rows whose values are unchanged are not rewritten. Expects
+    no duplicate keys in the buffer. Returns the number of rows inserted.
+    """
+    stage = f'{table}_stage'
+    conn = db.session.connection()
+    conn.execute(text(
+        f"CREATE TEMP TABLE {stage} ({', '.join(f'{col} text' for col in columns)}) ON COMMIT DROP"
+    ))
+    _copy_from_buffer(stage, columns, buf)
+
+    targets = [col for col in columns if col != key]
+    values = [
+        f'COALESCE(EXCLUDED.{col}, {table}.{col})' if col in keep_existing else f'EXCLUDED.{col}'
+        for col in targets
+    ]
+    column_list = ', '.join(columns)
+    inserted_flags = conn.execute(text(
+        f'INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} '
+        f'ON CONFLICT ({key}) DO UPDATE SET '
+        + ', '.join(f'{col} = {value}' for col, value in zip(targets, values))
+        + f" WHERE ({', '.join(f'{table}.{col}' for col in targets)}) IS DISTINCT FROM ({', '.join(values)}) "
+        'RETURNING (xmax = 0) AS inserted'
+    )).scalars().all()
+
+    return sum(1 for flag in inserted_flags if flag)
+
+def _copy_customers(df):
+    """
+    Upsert customers on PostgreSQL through COPY (see _copy_upsert).
+
+    Expects a frame from _clean_customer_frame with duplicates dropped. Optional columns only
+    overwrite existing values when the file has one, matching the row-by-row
+    import. Returns (imported, updated).
+    """
+    columns = list(df.columns)
+
+    # None is written unquoted-empty, which COPY ... CSV reads as NULL
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    imported = _copy_upsert(Customer.__tablename__, 'account_number', columns, buf, keep_existing=columns[2:])
+    _mark_reports_stale(db.session)
+    return imported, len(df) - imported
+
+# Backends with a native INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE
+UPSERT_DIALECTS = ('postgresql', 'sqlite', 'mysql')
+
+def _upsert(model, key, rows, keep_existing=()):
+    """
+    Insert-or-update rows in one executemany using the dialect's native upsert,
+    keyed on the unique column `key`. Columns in keep_existing only overwrite
+    the stored value when the incoming one is not NULL. Unchanged rows are not
+    rewritten (MySQL already skips identical updates on its own).
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+    table = model.__table__
+    stmt = dialect_insert(table)
+    incoming = stmt.inserted if dialect == 'mysql' else stmt.excluded
+    set_ = {
+        col: func.coalesce(incoming[col], table.c[col]) if col in keep_existing else incoming[col]
+        for col in rows[0] if col != key
+    }
+    if dialect == 'mysql':
+        stmt = stmt.on_duplicate_key_update(set_)
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_=set_,
+            where=or_(*(table.c[col].is_distinct_from(value) for col, value in set_.items()))
+        )
+    db.session.execute(stmt, rows)
+
+def _upsert_customers(df):
+    """
+    Upsert customers keyed on account_number in committed batches. Expects a
+    frame from _clean_customer_frame with duplicate account numbers dropped - one upsert can't touch the
+    same row twice. Returns (imported, updated) - imported is the change in
+    row count.
+    """
+    total_rows = len(df)
+    columns = list(df.columns)
+    rows = df.to_dict(orient='records')
+
+    before = _count(Customer)
+    batch_size = _import_batch_size()
+    for i in range(0, len(rows), batch_size):
+        _upsert(Customer, 'account_number', rows[i:i + batch_size], keep_existing=columns[2:])
+        _mark_reports_stale(db.session)
+        _commit_batch()
+
+    imported = _count(Customer) - before
+    return imported, total_rows - imported
+
+def _read_customer_chunks(stream, filename):
+    """
+    Yield the customer file as DataFrames of up to CUSTOMER_IMPORT_CHUNK_SIZE rows,
+    with normalized column names. CSV is read incrementally and as text, so account
+    numbers keep leading zeros; Excel has to be loaded whole and is sliced.
+    """
+    if filename.lower().endswith('.csv'):
+        chunks = pd.read_csv(stream, chunksize=CUSTOMER_IMPORT_CHUNK_SIZE, dtype=str)
+    else:
+        df = pd.read_excel(stream)
+        chunks = (df.iloc[i:i + CUSTOMER_IMPORT_CHUNK_SIZE]
+                  for i in range(0, max(len(df), 1), CUSTOMER_IMPORT_CHUNK_SIZE))
+    
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.lower().str.replace(' ', '_')
+        yield chunk.rename(columns={'account': 'account_number', 'customer_name': 'name'})
+
+def _merge_customers(df):
+    """
+    Insert-or-update customers through the ORM, for backends without a native
+    upsert. Existing rows are fetched with one IN query per IN_CLAUSE_CHUNK_SIZE
+    keys rather than one lookup per row. Returns (imported, updated).
+    """
+    keys = df['account_number'].tolist()
+    existing = {}
+    for i in range(0, len(keys), IN_CLAUSE_CHUNK_SIZE):
+        existing.update(
+            (customer.account_number, customer)
+            for customer in Customer.query.filter(Customer.account_number.in_(keys[i:i + IN_CLAUSE_CHUNK_SIZE]))
+        )
+    
+    imported = updated = 0
+    for row in df.to_dict(orient='records'):
+        customer = existing.get(row['account_number'])
+        if customer:
+            # Optional fields only overwrite when the file has a value
+            for col, value in row.items():
+                if value is not None:
+                    setattr(customer, col, value)
+            updated += 1
+        else:
+            db.session.add(Customer(**row))
+            imported += 1
+    return imported, updated
 
 @admin_bp.route('/import-customers', methods=['GET', 'POST'])
 @login_required
@@ -1137,70 +1649,46 @@ def import_customers():
         
         if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
             try:
-                # Read the file
-                if file.filename.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
-                
-                # Normalize column names
-                df.columns = df.columns.str.lower().str.replace(' ', '_')
+                # Read the file in chunks - columns are checked on the first one
+                chunks = _read_customer_chunks(file, file.filename)
+                first = next(chunks, None)
+                columns = first.columns if first is not None else []
                 
                 # Check for required columns
-                if 'account_number' not in df.columns and 'account' not in df.columns:
+                if 'account_number' not in columns:
                     flash('File must contain an "account_number" or "account" column', 'danger')
                     return redirect(request.url)
                 
-                if 'name' not in df.columns and 'customer_name' not in df.columns:
+                if 'name' not in columns:
                     flash('File must contain a "name" or "customer_name" column', 'danger')
                     return redirect(request.url)
                 
-                # Rename columns if needed
-                if 'account' in df.columns:
-                    df.rename(columns={'account': 'account_number'}, inplace=True)
-                if 'customer_name' in df.columns:
-                    df.rename(columns={'customer_name': 'name'}, inplace=True)
-                
-                # Import customers
+                # Import customers, committing after every chunk
                 imported = 0
-                skipped = 0
                 updated = 0
-                
-                for _, row in df.iterrows():
-                    account_number = str(row['account_number']).strip()
-                    name = str(row['name']).strip()
-                    
-                    if not account_number or not name or account_number == 'nan' or name == 'nan':
-                        skipped += 1
-                        continue
+                skipped = 0
+                with _import_session():
+                    for df in chain([first], chunks):
+                        df, dropped = _clean_customer_frame(df)
+                        
+                        # Repeated account numbers: the last row wins (later chunks overwrite earlier ones)
+                        total_rows = len(df)
+                        df = df.drop_duplicates(subset=['account_number'], keep='last')
+                        skipped += dropped + total_rows - len(df)
+                        if df.empty:
+                            continue
+                        
+                        # Large files: stream through COPY on PostgreSQL (psycopg2)
+                        if _supports_copy():
+                            chunk_imported, chunk_updated = _copy_customers(df)
+                        elif db.engine.dialect.name in UPSERT_DIALECTS:
+                            chunk_imported, chunk_updated = _upsert_customers(df)
+                        else:
+                            chunk_imported, chunk_updated = _merge_customers(df)
+                        imported += chunk_imported
+                        updated += chunk_updated
+                        _commit_batch()
                     
-                    # Check if customer already exists
-                    existing = Customer.query.filter_by(account_number=account_number).first()
-                    if existing:
-                        # Update existing customer
-                        existing.name = name
-                        if 'contact_name' in row and pd.notna(row['contact_name']):
-                            existing.contact_name = str(row['contact_name']).strip()
-                        if 'phone' in row and pd.notna(row['phone']):
-                            existing.phone = str(row['phone']).strip()
-                        if 'email' in row and pd.notna(row['email']):
-                            existing.email = str(row['email']).strip()
-                        if 'address' in row and pd.notna(row['address']):
-                            existing.address = str(row['address']).strip()
-                        updated += 1
-                    else:
-                        # Create new customer
-                        customer = Customer(
-                            account_number=account_number,
-                            name=name,
-                            contact_name=str(row.get('contact_name', '')).strip() if 'contact_name' in row and pd.notna(row.get('contact_name')) else None,
-                            phone=str(row.get('phone', '')).strip() if 'phone' in row and pd.notna(row.get('phone')) else None,
-                            email=str(row.get('email', '')).strip() if 'email' in row and pd.notna(row.get('email')) else None,
-                            address=str(row.get('address', '')).strip() if 'address' in row and pd.notna(row.get('address')) else None
-                        )
-                        db.session.add(customer)
-                        imported += 1
-                
                 db.session.commit()
                 flash(f'Successfully imported {imported} new customers and updated {updated} existing customers ({skipped} skipped)', 'success')
                 return redirect(url_for('admin.dashboard'))
@@ -1215,11 +1703,152 @@ def import_customers():
     
     return render_template('admin/import_customers.html', title='Import Customers')
 
+def _chunk_rows(rows, chunksize):
+    """Split a row iterator into (header, rows) chunks - the first row is the header"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    header = ['' if h is None else str(h) for h in header]
+    while True:
+        batch = list(islice(rows, chunksize))
+        if not batch:
+            break
+        yield header, batch
+
+def _read_import_chunks(stream, filename, chunksize):
+    """
+    Yield a CSV/Excel byte stream as (header, rows) with at most chunksize
+    rows per chunk. CSV streams through the stdlib csv module. Excel goes
+    through python-calamine when installed, else openpyxl's read-only mode
+    for .xlsx and pandas for legacy .xls - no DataFrame is built otherwise.
+    """
+    if filename.endswith('.csv'):
+        yield from _chunk_rows(csv.reader(codecs.iterdecode(stream, 'utf-8-sig')), chunksize)
+    elif CalamineWorkbook is not None:
+        # Rust-based reader - several times faster than openpyxl, and reads .xls too
+        sheet = CalamineWorkbook.from_filelike(stream).get_sheet_by_index(0)
+        yield from _chunk_rows(sheet.iter_rows(), chunksize)
+    elif filename.endswith('.xlsx'):
+        wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            yield from _chunk_rows(wb.worksheets[0].iter_rows(values_only=True), chunksize)
+        finally:
+            wb.close()
+    else:
+        df = pd.read_excel(stream)
+        yield [str(c) for c in df.columns], list(df.itertuples(index=False, name=None))
+
+def _clean_cell(value):
+    """Stripped string for a raw import cell, or None when it is missing/NaN/blank"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Excel readers hand whole numbers back as floats - keep code 123 as "123", not "123.0"
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def _import_product_chunk(rows, code_col, name_col, description_col=None):
+    """
+    Insert/update one chunk of a product import from raw row tuples, given
+    the column positions. Existing codes are detected by the database through
+    the unique code index. Returns (imported, updated, skipped).
+    """
+    skipped = 0
+    
+    # Keyed by code so a code repeated in the chunk keeps only its last row
+    products = {}
+    for row in rows:
+        # Short rows (ragged CSV / read-only sheets) just mean empty trailing cells
+        code = _clean_cell(row[code_col]) if code_col < len(row) else None
+        name = _clean_cell(row[name_col]) if name_col < len(row) else None
+        if code is None or name is None:
+            skipped += 1
+            continue
+        description = None
+        if description_col is not None and description_col < len(row):
+            description = _clean_cell(row[description_col])
+        if code in products:
+            skipped += 1
+        products[code] = (name, description)
+    
+    if not products:
+        return 0, 0, skipped
+    
+    if _supports_copy():
+        # COPY into a staging table and merge with one INSERT ... ON CONFLICT
+        buf = io.StringIO()
+        csv.writer(buf).writerows((code, name, description) for code, (name, description) in products.items())
+        buf.seek(0)
+        imported = _copy_upsert(Product.__tablename__, 'code', ['code', 'name', 'description'], buf,
+                                keep_existing=['description'])
+        _commit_batch()
+        return imported, len(products) - imported, skipped
+    
+    params = [
+        {'code': code, 'name': name, 'description': description}
+        for code, (name, description) in products.items()
+    ]
+    before = _count(Product)
+    batch_size = _import_batch_size()
+    for i in range(0, len(params), batch_size):
+        # Description only overwrites when the file has one
+        _upsert(Product, 'code', params[i:i + batch_size], keep_existing=['description'])
+        _commit_batch()
+    
+    imported = _count(Product) - before
+    return imported, len(params) - imported, skipped
+
+def _run_product_import(job_id, path, filename):
+    """Background worker for a product import saved to path; reports progress on the job row"""
+    imported = 0
+    updated = 0
+    skipped = 0
+    update_background_job(job_id, status='running')
+    try:
+        with open(path, 'rb') as stream, _import_session():
+            # Parse and write one chunk at a time so memory stays flat on large files
+            for header, rows in _read_import_chunks(stream, filename, _import_batch_size()):
+                # Normalize column names
+                columns = {str(col).lower().replace(' ', '_'): i for i, col in enumerate(header)}
+                
+                # Check for required columns
+                if 'code' not in columns and 'product_code' not in columns:
+                    raise ValueError('File must contain a "code" or "product_code" column')
+                
+                if 'name' not in columns and 'product_name' not in columns:
+                    raise ValueError('File must contain a "name" or "product_name" column')
+                
+                chunk_imported, chunk_updated, chunk_skipped = _import_product_chunk(
+                    rows,
+                    columns.get('code', columns.get('product_code')),
+                    columns.get('name', columns.get('product_name')),
+                    columns.get('description'),
+                )
+                imported += chunk_imported
+                updated += chunk_updated
+                skipped += chunk_skipped
+                update_background_job(job_id, processed=BackgroundJob.processed + len(rows))
+        
+        update_background_job(
+            job_id,
+            status='done',
+            finished_at=datetime.utcnow(),
+            message=f'Successfully imported {imported} new products and updated {updated} existing products ({skipped} skipped)'
+        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in product import job {job_id}: {e}", exc_info=True)
+        update_background_job(job_id, status='failed', finished_at=datetime.utcnow(), message=f'Error importing file: {str(e)}')
+    finally:
+        os.remove(path)
+
 @admin_bp.route('/import-products', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def import_products():
-    """Import products from CSV/Excel file (Admin only)"""
+    """Import products from CSV/Excel file (Admin only) - runs as a background job"""
     if request.method == 'POST':
         if 'file' not in request.files:
             flash('No file selected', 'danger')
@@ -1232,64 +1861,18 @@ def import_products():
         
         if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
             try:
-                # Read the file
-                if file.filename.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
-                
-                # Normalize column names
-                df.columns = df.columns.str.lower().str.replace(' ', '_')
-                
-                # Check for required columns
-                if 'code' not in df.columns and 'product_code' not in df.columns:
-                    flash('File must contain a "code" or "product_code" column', 'danger')
-                    return redirect(request.url)
-                
-                if 'name' not in df.columns and 'product_name' not in df.columns:
-                    flash('File must contain a "name" or "product_name" column', 'danger')
-                    return redirect(request.url)
-                
-                # Rename columns if needed
-                if 'product_code' in df.columns:
-                    df.rename(columns={'product_code': 'code'}, inplace=True)
-                if 'product_name' in df.columns:
-                    df.rename(columns={'product_name': 'name'}, inplace=True)
-                
-                # Import products
-                imported = 0
-                skipped = 0
-                updated = 0
-                
-                for _, row in df.iterrows():
-                    code = str(row['code']).strip()
-                    name = str(row['name']).strip()
-                    
-                    if not code or not name or code == 'nan' or name == 'nan':
-                        skipped += 1
-                        continue
-                    
-                    # Check if product already exists
-                    existing = Product.query.filter_by(code=code).first()
-                    if existing:
-                        # Update existing product
-                        existing.name = name
-                        if 'description' in row and pd.notna(row['description']):
-                            existing.description = str(row['description']).strip()
-                        updated += 1
-                    else:
-                        # Create new product
-                        product = Product(
-                            code=code,
-                            name=name,
-                            description=str(row.get('description', '')).strip() if 'description' in row and pd.notna(row.get('description')) else None
-                        )
-                        db.session.add(product)
-                        imported += 1
+                # Save the upload so the worker thread can read it after this request ends
+                upload_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+                os.makedirs(upload_dir, exist_ok=True)
+                path = os.path.join(upload_dir, f"{uuid.uuid4().hex[:8]}_{secure_filename(file.filename)}")
+                file.save(path)
                 
+                job = BackgroundJob(kind='product_import', filename=file.filename, created_by=current_user.id)
+                db.session.add(job)
                 db.session.commit()
-                flash(f'Successfully imported {imported} new products and updated {updated} existing products ({skipped} skipped)', 'success')
-                return redirect(url_for('admin.dashboard'))
+                
+                run_in_background(_run_product_import, job.id, path, file.filename)
+                return redirect(url_for('admin.import_status', job_id=job.id))
                 
             except Exception as e:
                 db.session.rollback()
@@ -1300,3 +1883,19 @@ def import_products():
             return redirect(request.url)
     
     return render_template('admin/import_products.html', title='Import Products')
+
+@admin_bp.route('/import/<int:job_id>')
+@login_required
+@admin_required
+def import_status(job_id):
+    """Status page for a background import job"""
+    job = BackgroundJob.query.get_or_404(job_id)
+    return render_template('admin/import_status.html', title='Import Status', job=job)
+
+@admin_bp.route('/import/<int:job_id>/progress')
+@login_required
+@admin_required
+def import_progress(job_id):
+    """Polled by the status page while a background import runs"""
+    job = BackgroundJob.query.get_or_404(job_id)
+    return ojsonify(job.to_dict())
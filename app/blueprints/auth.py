@@ -4,6 +4,7 @@ from app import db
 from app.models import User
 from app.forms import LoginForm, ForcePasswordChangeForm, ChangePasswordForm
 from datetime import datetime
+from sqlalchemy import or_, case
 
 
 auth_bp = Blueprint('auth', __name__)
@@ -16,12 +17,20 @@ def login():
     
     form = LoginForm()
     if request.method == 'POST' and form.validate_on_submit():
-        # Try login by email first, then username
-        user = User.query.filter_by(email=form.username.data).first() or \
-               User.query.filter_by(username=form.username.data).first()
+        # Email or username in one lookup - an email match still wins over a username match
+        identifier = form.username.data
+        user = User.query.filter(
+            or_(User.email == identifier, User.username == identifier)
+        ).order_by(case((User.email == identifier, 0), else_=1)).first()
         
-        # Updated to use password hashing
-        if user and user.check_password(form.password.data) and user.is_active:
+        # Only active accounts are checked against their real hash; unknown and
+        # disabled ones hash against the dummy so every failure takes the same time
+        if user and user.is_active:
+            password_ok = user.check_password(form.password.data)
+        else:
+            password_ok = User.check_password_dummy(form.password.data)
+        
+        if password_ok:
             login_user(user)
             user.last_login = datetime.now()
             db.session.commit()
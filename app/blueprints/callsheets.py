@@ -1,18 +1,137 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from app import db
-from app.models import Callsheet, CallsheetEntry, CallsheetArchive, Customer, User, CallHistory
+from app import db, cache
+from app.models import Callsheet, CallsheetEntry, CallsheetArchive, Customer, CustomerAddress, User, CallHistory
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, selectinload, object_session
 import json
 import calendar
-from sqlalchemy import func
+from sqlalchemy import select, update, func, and_, or_, case, cast, literal_column, Text, event
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.exc import IntegrityError
 import logging
 
 logger = logging.getLogger(__name__)
 
 callsheets_bp = Blueprint('callsheets', __name__, url_prefix='/callsheets')
 
+# Customer columns written into archive/completion snapshots
+SNAPSHOT_CUSTOMER_COLUMNS = (Customer.name, Customer.account_number, Customer.callsheet_notes)
+
+DUPLICATE_CALLSHEET_MESSAGE = 'A callsheet with this name already exists for this day'
+
+def _is_duplicate_callsheet(error):
+    """
+    True when error is a violation of ux_callsheet_active_name - other integrity
+    errors (foreign keys, NOT NULL) keep their own message
+    """
+    if not isinstance(error, IntegrityError):
+        return False
+    # psycopg2 names the constraint; SQLite only lists the index columns in its message
+    constraint = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+    if constraint:
+        return constraint == 'ux_callsheet_active_name'
+    message = str(error.orig)
+    return 'ux_callsheet_active_name' in message or 'callsheet.name, callsheet.day_of_week' in message
+
+# Archive rows never change once written, so the single-archive views are cached for
+# long. A commit that wrote CallsheetArchive bumps the generation to drop them all; the
+# history list grows with every completion and is not cached, since with the default
+# per-process cache the bump only reaches the worker that committed
+ARCHIVE_VIEW_TIMEOUT = 86400
+ARCHIVE_GENERATION_KEY = 'callsheet_archive:generation'
+
+def _archive_cache_key():
+    """Cache key for an archive GET - path plus its sorted query args"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f"callsheet_archive:{cache.get(ARCHIVE_GENERATION_KEY) or 0}:{request.path}?{args}"
+
+def _mark_archive_written(mapper, connection, target):
+    """Flag the session - the generation is bumped once the write commits"""
+    session = object_session(target)
+    if session is not None:
+        session.info['invalidate_archive'] = True
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(CallsheetArchive, _event, _mark_archive_written)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_archive_views(session):
+    """Bump after commit, so no request can re-cache the rows as they were before it"""
+    if session.info.pop('invalidate_archive', False):
+        cache.set(ARCHIVE_GENERATION_KEY, (cache.get(ARCHIVE_GENERATION_KEY) or 0) + 1, timeout=0)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_archive_mark(session):
+    session.info.pop('invalidate_archive', None)
+
+def _claim_position(callsheet_id):
+    """
+    Next free entry position on a callsheet. The increment is a single UPDATE, so
+    it row-locks the callsheet until commit and concurrent adds/pauses can't be
+    handed the same position (a MAX(position) + 1 read could).
+    """
+    bump = update(Callsheet).where(Callsheet.id == callsheet_id).values(next_position=Callsheet.next_position + 1)
+    if db.engine.dialect.name == 'postgresql':
+        # UPDATE ... RETURNING - one round trip
+        return db.session.execute(bump.returning(Callsheet.next_position)).scalar()
+    db.session.execute(bump)
+    return db.session.execute(select(Callsheet.next_position).where(Callsheet.id == callsheet_id)).scalar()
+
+def _reset_entries(criterion, now):
+    """
+    Set matching entries back to 'not_called' in one UPDATE, stamping updated_at
+    with now (the app's local clock) - customer.callsheet_notes are untouched
+    """
+    return CallsheetEntry.query.filter(criterion).update({
+        'call_status': 'not_called',
+        'called_by': None,
+        'call_date': None,
+        'person_spoken_to': None,
+        'callback_time': None,
+        'updated_at': now
+    }, synchronize_session=False)
+
+def _json_object(**fields):
+    """json_build_object(...) from keyword arguments - keys are rendered as SQL string literals"""
+    args = []
+    for key, value in fields.items():
+        args += [literal_column(f"'{key}'"), value]
+    return func.json_build_object(*args)
+
+def _month_archive_json(criterion):
+    """
+    Month archive payload as JSON text, aggregated by PostgreSQL with json_agg so
+    no callsheet or entry rows are loaded or serialized here. Same shape and entry
+    order as the Python build in archive_callsheets.
+    """
+    entry = _json_object(
+        customer_id=CallsheetEntry.customer_id,
+        customer_name=Customer.name,
+        customer_account=Customer.account_number,
+        call_status=CallsheetEntry.call_status,
+        called_by=CallsheetEntry.called_by,
+        person_spoken_to=CallsheetEntry.person_spoken_to,
+        callback_time=CallsheetEntry.callback_time,
+        notes=Customer.callsheet_notes
+    )
+    entries = select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(entry, CallsheetEntry.is_paused, CallsheetEntry.position, CallsheetEntry.id)),
+            literal_column("'[]'::json")
+        )
+    ).select_from(CallsheetEntry).join(CallsheetEntry.customer).where(
+        CallsheetEntry.callsheet_id == Callsheet.id
+    ).correlate(Callsheet).scalar_subquery()
+    
+    sheet = _json_object(name=Callsheet.name, day_of_week=Callsheet.day_of_week, entries=entries)
+    return db.session.execute(
+        select(cast(
+            func.coalesce(func.json_agg(aggregate_order_by(sheet, Callsheet.id)), literal_column("'[]'::json")),
+            Text
+        )).where(criterion)
+    ).scalar()
+
 @callsheets_bp.route('/')
 @login_required
 def callsheets():
@@ -22,7 +141,12 @@ def callsheets():
     callsheets = Callsheet.query.filter_by(
         is_active=True
     ).options(
-        joinedload(Callsheet.entries).joinedload(CallsheetEntry.customer)
+        # Only the customer/address columns the page shows - and the address in the
+        # same query instead of a lazy load per entry
+        selectinload(Callsheet.entries).joinedload(CallsheetEntry.customer).load_only(
+            Customer.name, Customer.account_number, Customer.phone, Customer.callsheet_notes
+        ),
+        selectinload(Callsheet.entries).joinedload(CallsheetEntry.address).load_only(CustomerAddress.phone)
     ).order_by(
         Callsheet.day_of_week,
         Callsheet.name
@@ -34,11 +158,10 @@ def callsheets():
     
     for callsheet in callsheets:
         if callsheet.day_of_week in callsheets_by_day:
-            # Load entries and separate active from paused
-            all_entries = sorted(callsheet.entries, key=lambda x: x.position)
-            
-            active_entries = [e for e in all_entries if not e.is_paused]
-            paused_entries = [e for e in all_entries if e.is_paused]
+            # Entries arrive ordered by (is_paused, position) - split them in one pass
+            active_entries, paused_entries = [], []
+            for entry in callsheet.entries:
+                (paused_entries if entry.is_paused else active_entries).append(entry)
             
             callsheet_data = {
                 'id': callsheet.id,
@@ -48,15 +171,13 @@ def callsheets():
             }
             callsheets_by_day[callsheet.day_of_week].append(callsheet_data)
     
-    # Get all customers for add customer modal
-    all_customers = Customer.query.order_by(Customer.name).all()
-    
+    # The add-customer modal looks customers up through /customers/api/search,
+    # so the page itself doesn't load the customer table
     return render_template(
         'callsheets.html',
         title='Call Sheets',
         callsheets_by_day=callsheets_by_day,
         days_of_week=days_of_week,
-        all_customers=all_customers,
         current_user=current_user
     )
 
@@ -67,19 +188,7 @@ def create_callsheet():
     data = request.json
     
     try:
-        # Check for duplicate name on same day
-        existing = Callsheet.query.filter_by(
-            name=data['name'],
-            day_of_week=data['day_of_week'],
-            is_active=True
-        ).first()
-        
-        if existing:
-            return jsonify({
-                'success': False, 
-                'message': 'A callsheet with this name already exists for this day'
-            }), 400
-        
+        # Duplicate active names on the same day are rejected by ux_callsheet_active_name
         callsheet = Callsheet(
             name=data['name'],
             day_of_week=data['day_of_week'],
@@ -98,6 +207,8 @@ def create_callsheet():
         })
     except Exception as e:
         db.session.rollback()
+        if _is_duplicate_callsheet(e):
+            return jsonify({'success': False, 'message': DUPLICATE_CALLSHEET_MESSAGE}), 400
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @callsheets_bp.route('/api/callsheet/<int:callsheet_id>/update', methods=['POST'])
@@ -108,23 +219,8 @@ def update_callsheet(callsheet_id):
     data = request.json
     
     try:
+        # A rename or move onto another active callsheet's name/day fails the unique index
         if 'name' in data:
-            # Check for duplicate name
-            existing = Callsheet.query.filter(
-                Callsheet.name == data['name'],
-                Callsheet.day_of_week == callsheet.day_of_week,
-                Callsheet.month == callsheet.month,
-                Callsheet.year == callsheet.year,
-                Callsheet.is_active == True,
-                Callsheet.id != callsheet_id
-            ).first()
-            
-            if existing:
-                return jsonify({
-                    'success': False, 
-                    'message': 'A callsheet with this name already exists for this day'
-                }), 400
-            
             callsheet.name = data['name']
         
         if 'day_of_week' in data:
@@ -134,6 +230,8 @@ def update_callsheet(callsheet_id):
         return jsonify({'success': True, 'message': 'Callsheet updated successfully'})
     except Exception as e:
         db.session.rollback()
+        if _is_duplicate_callsheet(e):
+            return jsonify({'success': False, 'message': DUPLICATE_CALLSHEET_MESSAGE}), 400
         return jsonify({'success': False, 'message': str(e)}), 400
 
 @callsheets_bp.route('/api/callsheet/<int:callsheet_id>/delete', methods=['POST'])
@@ -180,10 +278,6 @@ def add_customer_to_callsheet(callsheet_id):
                 'message': f'{customer.name} - {address_label or "Primary"} is already on this callsheet'
             }), 400
         
-        # Get the highest position
-        max_position = db.session.query(db.func.max(CallsheetEntry.position))\
-            .filter_by(callsheet_id=callsheet_id).scalar() or 0
-        
         # Create new entry
         entry = CallsheetEntry(
             callsheet_id=callsheet_id,
@@ -191,7 +285,7 @@ def add_customer_to_callsheet(callsheet_id):
             address_id=address_id,
             address_label=address_label,
             user_id=current_user.id,
-            position=max_position + 1
+            position=_claim_position(callsheet_id)
         )
         
         db.session.add(entry)
@@ -223,6 +317,7 @@ def update_callsheet_entry_status(entry_id):
     """Update call status with automatic tracking"""
     entry = CallsheetEntry.query.get_or_404(entry_id)
     data = request.json
+    now = datetime.now()  # one timestamp for the entry and its call history row
 
     try:
         # Update call status
@@ -234,7 +329,7 @@ def update_callsheet_entry_status(entry_id):
             # Record who called and when (if status changed from not_called)
             if new_status != 'not_called' and entry.called_by is None:
                 entry.called_by = current_user.username
-                entry.call_date = datetime.now()
+                entry.call_date = now
 
             # Handle person_spoken_to for ALL statuses (not just ordered)
             if 'person_spoken_to' in data:
@@ -247,7 +342,6 @@ def update_callsheet_entry_status(entry_id):
             # Track this call in history (skip if status is 'not_called')
             if new_status != 'not_called' and old_status != new_status:
                 try:
-                    now = datetime.now()
                     call_history = CallHistory(
                         customer_id=entry.customer_id,
                         callsheet_id=entry.callsheet_id,
@@ -266,7 +360,7 @@ def update_callsheet_entry_status(entry_id):
 
         # Track who made the update
         entry.user_id = current_user.id
-        entry.updated_at = datetime.now()
+        entry.updated_at = now
 
         db.session.commit()
 
@@ -330,9 +424,7 @@ def toggle_pause_callsheet_entry(entry_id):
         
         # When pausing, move to end of list
         if entry.is_paused:
-            max_position = db.session.query(func.max(CallsheetEntry.position))\
-                .filter_by(callsheet_id=entry.callsheet_id).scalar() or 0
-            entry.position = max_position + 1
+            entry.position = _claim_position(entry.callsheet_id)
         
         db.session.commit()
         
@@ -351,31 +443,30 @@ def toggle_pause_callsheet_entry(entry_id):
 @login_required
 def reorder_callsheet_entry(entry_id):
     """Update position of entry for drag-and-drop reordering"""
-    entry = CallsheetEntry.query.get_or_404(entry_id)
+    callsheet_id, old_position = db.first_or_404(
+        select(CallsheetEntry.callsheet_id, CallsheetEntry.position).where(CallsheetEntry.id == entry_id)
+    )
     data = request.json
     
     try:
         new_position = data.get('position')
-        old_position = entry.position
-        callsheet_id = entry.callsheet_id
         
-        # Update positions of other entries
+        # The entry and the entries it passes shift in a single UPDATE
         if new_position > old_position:
             # Moving down - decrement positions in between
-            CallsheetEntry.query.filter(
-                CallsheetEntry.callsheet_id == callsheet_id,
-                CallsheetEntry.position > old_position,
-                CallsheetEntry.position <= new_position
-            ).update({'position': CallsheetEntry.position - 1})
+            passed = and_(CallsheetEntry.position > old_position, CallsheetEntry.position <= new_position)
+            shifted = CallsheetEntry.position - 1
         else:
             # Moving up - increment positions in between
-            CallsheetEntry.query.filter(
-                CallsheetEntry.callsheet_id == callsheet_id,
-                CallsheetEntry.position >= new_position,
-                CallsheetEntry.position < old_position
-            ).update({'position': CallsheetEntry.position + 1})
-        
-        entry.position = new_position
+            passed = and_(CallsheetEntry.position >= new_position, CallsheetEntry.position < old_position)
+            shifted = CallsheetEntry.position + 1
+        
+        CallsheetEntry.query.filter(
+            CallsheetEntry.callsheet_id == callsheet_id,
+            or_(CallsheetEntry.id == entry_id, passed)
+        ).update({
+            'position': case((CallsheetEntry.id == entry_id, new_position), else_=shifted)
+        }, synchronize_session=False)
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Order updated'})
@@ -392,24 +483,13 @@ def reset_week():
     year = data.get('year')
     
     try:
-        # Get all active callsheets for the month
-        callsheets = Callsheet.query.filter_by(
-            month=month, 
-            year=year, 
-            is_active=True
-        ).all()
-        
-        for callsheet in callsheets:
-            # Reset all entries to 'not_called'
-            entries = CallsheetEntry.query.filter_by(callsheet_id=callsheet.id).all()
-            for entry in entries:
-                entry.call_status = 'not_called'
-                entry.called_by = None
-                entry.call_date = None
-                entry.person_spoken_to = None
-                entry.callback_time = None
-                entry.updated_at = datetime.now()
-                # Note: customer.callsheet_notes are preserved automatically!
+        # Reset every entry on the month's active callsheets to 'not_called'
+        active_callsheets = select(Callsheet.id).where(
+            Callsheet.month == month,
+            Callsheet.year == year,
+            Callsheet.is_active == True
+        )
+        _reset_entries(CallsheetEntry.callsheet_id.in_(active_callsheets), datetime.now())
         
         db.session.commit()
         
@@ -430,47 +510,51 @@ def archive_callsheets():
     year = data.get('year')
     
     try:
-        # Get all callsheets for the month
-        callsheets = Callsheet.query.filter_by(
-            month=month, 
-            year=year, 
-            is_active=True
-        ).all()
+        month_callsheets = (
+            Callsheet.month == month,
+            Callsheet.year == year,
+            Callsheet.is_active == True
+        )
         
-        # Create archive data
-        archive_data = []
-        for cs in callsheets:
-            entries = CallsheetEntry.query.filter_by(callsheet_id=cs.id).all()
-            cs_data = {
-                'name': cs.name,
-                'day_of_week': cs.day_of_week,
-                'entries': [
-                    {
-                        'customer_id': entry.customer_id,
-                        'customer_name': entry.customer.name,
-                        'customer_account': entry.customer.account_number,
-                        'call_status': entry.call_status,
-                        'called_by': entry.called_by,
-                        'person_spoken_to': entry.person_spoken_to,
-                        'callback_time': entry.callback_time,
-                        'notes': entry.customer.callsheet_notes
-                    } for entry in entries
-                ]
-            }
-            archive_data.append(cs_data)
+        if db.engine.dialect.name == 'postgresql':
+            # The database builds the JSON document itself
+            archive_json = _month_archive_json(and_(*month_callsheets))
+        else:
+            # Get all callsheets for the month, with their entries and customers in the same query
+            callsheets = Callsheet.query.filter(*month_callsheets).options(
+                selectinload(Callsheet.entries).joinedload(CallsheetEntry.customer).load_only(*SNAPSHOT_CUSTOMER_COLUMNS)
+            ).order_by(Callsheet.id).all()
+            
+            archive_json = json.dumps([
+                {
+                    'name': cs.name,
+                    'day_of_week': cs.day_of_week,
+                    'entries': [
+                        {
+                            'customer_id': entry.customer_id,
+                            'customer_name': entry.customer.name,
+                            'customer_account': entry.customer.account_number,
+                            'call_status': entry.call_status,
+                            'called_by': entry.called_by,
+                            'person_spoken_to': entry.person_spoken_to,
+                            'callback_time': entry.callback_time,
+                            'notes': entry.customer.callsheet_notes
+                        } for entry in cs.entries
+                    ]
+                } for cs in callsheets
+            ])
         
         # Create archive record
         archive = CallsheetArchive(
             month=month,
             year=year,
-            data=json.dumps(archive_data),
+            data=archive_json,
             archived_by=current_user.id
         )
         db.session.add(archive)
         
         # Mark current callsheets as inactive
-        for cs in callsheets:
-            cs.is_active = False
+        Callsheet.query.filter(*month_callsheets).update({'is_active': False}, synchronize_session=False)
         
         db.session.commit()
         
@@ -486,17 +570,20 @@ def archive_callsheets():
 @login_required
 def complete_callsheet(callsheet_id):
     """Complete a callsheet - save snapshot and reset for next use"""
-    callsheet = Callsheet.query.get_or_404(callsheet_id)
+    # Entries and their customers come back with the callsheet - no per-entry lookups
+    callsheet = Callsheet.query.options(
+        selectinload(Callsheet.entries).joinedload(CallsheetEntry.customer).load_only(*SNAPSHOT_CUSTOMER_COLUMNS)
+    ).get_or_404(callsheet_id)
     
     try:
-        # Get all entries for this callsheet
-        entries = CallsheetEntry.query.filter_by(callsheet_id=callsheet_id).all()
+        entries = callsheet.entries
+        now = datetime.now()
         
         # Create snapshot data
         snapshot_data = {
             'callsheet_name': callsheet.name,
             'day_of_week': callsheet.day_of_week,
-            'completed_date': datetime.now().isoformat(),
+            'completed_date': now.isoformat(),
             'completed_by': current_user.username,
             'entries': [
                 {
@@ -514,21 +601,15 @@ def complete_callsheet(callsheet_id):
         
         # Save snapshot
         completion = CallsheetArchive(
-            month=datetime.now().month,
-            year=datetime.now().year,
+            month=now.month,
+            year=now.year,
             data=json.dumps(snapshot_data),
             archived_by=current_user.id
         )
         db.session.add(completion)
         
         # Reset all entries
-        for entry in entries:
-            entry.call_status = 'not_called'
-            entry.called_by = None
-            entry.call_date = None
-            entry.person_spoken_to = None
-            entry.callback_time = None
-            entry.updated_at = datetime.now()
+        _reset_entries(CallsheetEntry.callsheet_id == callsheet_id, now)
         
         db.session.commit()
         
@@ -552,27 +633,38 @@ def callsheet_history_page():
 @callsheets_bp.route('/api/history')
 @login_required
 def callsheet_history():
-    """Get completion history"""
-    completions = CallsheetArchive.query.order_by(
-        CallsheetArchive.archived_at.desc()
-    ).limit(50).all()
+    """Get completion history - newest first, paginated with ?limit (default 50) and &offset"""
+    limit = request.args.get('limit', default=50, type=int)
+    offset = request.args.get('offset', default=0, type=int)
     
-    history = []
-    for completion in completions:
-        data = json.loads(completion.data)
-        history.append({
-            'id': completion.id,
-            'callsheet_name': data.get('callsheet_name', 'Unknown'),
-            'day_of_week': data.get('day_of_week', 'Unknown'),
-            'completed_date': data.get('completed_date'),
-            'completed_by': data.get('completed_by'),
-            'archived_at': completion.archived_at.isoformat()
-        })
+    # Summary columns only - the snapshot JSON in data is never loaded here
+    completions = db.session.execute(
+        select(
+            CallsheetArchive.id,
+            CallsheetArchive.callsheet_name,
+            CallsheetArchive.day_of_week,
+            CallsheetArchive.completed_date,
+            CallsheetArchive.completed_by,
+            CallsheetArchive.archived_at
+        ).order_by(
+            CallsheetArchive.archived_at.desc()
+        ).limit(limit).offset(offset)
+    ).all()
+    
+    history = [{
+        'id': completion.id,
+        'callsheet_name': completion.callsheet_name or 'Unknown',
+        'day_of_week': completion.day_of_week or 'Unknown',
+        'completed_date': completion.completed_date,
+        'completed_by': completion.completed_by,
+        'archived_at': completion.archived_at.isoformat()
+    } for completion in completions]
     
     return jsonify(history)
 
 @callsheets_bp.route('/api/callsheets/history/<int:completion_id>')
 @login_required
+@cache.cached(timeout=ARCHIVE_VIEW_TIMEOUT, key_prefix=_archive_cache_key)
 def view_callsheet_completion(completion_id):
     """View a specific completion"""
     completion = CallsheetArchive.query.get_or_404(completion_id)
@@ -587,21 +679,28 @@ def view_callsheet_completion(completion_id):
 @login_required
 def view_archived_callsheets(month, year):
     """View archived callsheets for a specific month/year"""
-    archive = CallsheetArchive.query.filter_by(month=month, year=year).first()
-    
-    if not archive:
-        flash(f'No archived callsheets found for {calendar.month_name[month]} {year}', 'warning')
-        return redirect(url_for('main.callsheets'))
-    
-    archive_data = json.loads(archive.data)
+    # The page itself is per-user (nav, flashes), so only the parsed archive is cached
+    key = _archive_cache_key()
+    archive = cache.get(key)
+    if archive is None:
+        row = CallsheetArchive.query.filter_by(month=month, year=year).first()
+        
+        if not row:
+            flash(f'No archived callsheets found for {calendar.month_name[month]} {year}', 'warning')
+            return redirect(url_for('main.callsheets'))
+        
+        archive = {
+            'archive_data': json.loads(row.data),
+            'archived_by': row.archived_by_user.username,
+            'archived_at': row.archived_at
+        }
+        cache.set(key, archive, timeout=ARCHIVE_VIEW_TIMEOUT)
     
     return render_template(
         'archived_callsheets.html',
         title=f'Archived Callsheets - {calendar.month_name[month]} {year}',
-        archive_data=archive_data,
         month=month,
         year=year,
-        archived_by=archive.archived_by_user.username,
-        archived_at=archive.archived_at
+        **archive
     )
 
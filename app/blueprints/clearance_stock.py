@@ -1,15 +1,244 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-from app import db
-from app.models import ClearanceStock
+from app import db, cache
+from app.models import ClearanceStock, BackgroundJob
 from datetime import datetime
-from sqlalchemy import or_
+from sqlalchemy import insert, select, func, literal_column, String, event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+from app.utils import ojsonify, run_in_background, update_background_job
 from werkzeug.utils import secure_filename
 import openpyxl
-from io import BytesIO
+import logging
+import os
+import uuid
+from contextlib import closing
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional - uploads fall back to openpyxl
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
 
 clearance_stock_bp = Blueprint('clearance_stock', __name__, url_prefix='/clearance')
 
+# First-column text marking title/header rows in the clearance sheet
+CLEARANCE_SKIP_LABELS = frozenset({'Qty', '2024 Stock Clearance'})
+
+# Columns read from each uploaded sheet row (qty .. supplier_link) - short rows are padded to this
+CLEARANCE_ROW_WIDTH = 8
+
+# Parsed rows sent (and committed) per executemany INSERT on uploads, unless IMPORT_BATCH_SIZE is set
+CLEARANCE_INSERT_BATCH = 5000
+
+# The pallet dropdown list is cached; a commit that wrote clearance stock drops it
+PALLETS_CACHE_KEY = 'clearance:pallets'
+PALLETS_CACHE_TIMEOUT = 3600
+
+def _mark_pallets_stale(session):
+    """Flag the session so the pallet list is dropped once it commits"""
+    session.info['invalidate_pallets'] = True
+
+def _mark_pallets_written(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _mark_pallets_stale(session)
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(ClearanceStock, _event, _mark_pallets_written)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_pallets(session):
+    """Drop after commit, so no request can re-cache the pallets as they were before it"""
+    if session.info.pop('invalidate_pallets', False):
+        cache.delete(PALLETS_CACHE_KEY)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pallets_mark(session):
+    session.info.pop('invalidate_pallets', None)
+
+# Default and largest page sizes for the item list
+CLEARANCE_PER_PAGE = 100
+CLEARANCE_MAX_PER_PAGE = 500
+
+# Item list columns by response field name, in to_dict()'s shape - ?fields picks from these
+CLEARANCE_LIST_COLUMNS = {column.key: column for column in (
+    ClearanceStock.id,
+    ClearanceStock.qty,
+    ClearanceStock.qty_sold,
+    ClearanceStock.supplier_code,
+    ClearanceStock.his_code,
+    ClearanceStock.description,
+    ClearanceStock.cost_price,
+    ClearanceStock.total_price,
+    ClearanceStock.supplier_link,
+    ClearanceStock.pallet,
+    ClearanceStock.created_at,
+    ClearanceStock.updated_at
+)}
+
+# The searchable columns as one string, so a search is a single ILIKE. On PostgreSQL the
+# ix_clearance_search_trgm trigram index is built on exactly this expression and serves
+# the '%term%' match; keep the two in step
+_BLANK = literal_column("''", String)
+_SPACE = literal_column("' '", String)
+CLEARANCE_SEARCH_TEXT = (
+    func.coalesce(ClearanceStock.supplier_code, _BLANK) + _SPACE +
+    func.coalesce(ClearanceStock.his_code, _BLANK) + _SPACE +
+    func.coalesce(ClearanceStock.description, _BLANK) + _SPACE +
+    func.coalesce(ClearanceStock.pallet, _BLANK)
+)
+
+def _save_clearance_batch(batch):
+    """Insert and commit one batch of parsed upload rows; returns the number saved"""
+    db.session.execute(insert(ClearanceStock.__table__), batch)
+    # Core INSERTs skip the mapper events, so flag the pallet list here
+    _mark_pallets_stale(db.session)
+    db.session.commit()
+    return len(batch)
+
+def _cell_text(value):
+    """
+    A text column's cell as stored - '' when blank. python-calamine returns every
+    number as a float, so whole numbers drop the '.0' and code 12345 stays "12345"
+    as openpyxl reads it
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value or '')
+
+def _sheet_rows(stream):
+    """
+    Value tuples for each row of the upload's Sheet1 - read by python-calamine when
+    installed (native parsing, formula results included), else openpyxl read-only.
+    Calamine gives '' for empty cells where openpyxl gives None, and floats for every
+    number; the parser treats both blanks alike and reads text columns through _cell_text.
+    """
+    if CalamineWorkbook is not None:
+        yield from CalamineWorkbook.from_filelike(stream).get_sheet_by_name('Sheet1').iter_rows()
+        return
+    # read_only streams cells instead of building the whole workbook (styles,
+    # formatting) up front, data_only gives formula results
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = wb['Sheet1']
+        # Read-only mode trusts the file's stored dimensions, which exporters often get
+        # wrong - clear them so every row is read and none is padded out to a stray width
+        # (short rows are padded to CLEARANCE_ROW_WIDTH by the caller)
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+def _run_clearance_import(job_id, path, user_id):
+    """
+    Background worker for a clearance upload saved to path. Rows read so far are
+    reported on the job as each batch commits; the final message lists every row error.
+    """
+    items_added = 0  # rows committed so far
+    row_num = 0
+    # One timestamp for the whole upload, so the column defaults aren't called per row
+    now = datetime.utcnow()
+    # Peak memory is one batch of row dicts, whatever the sheet size
+    batch_size = current_app.config.get('IMPORT_BATCH_SIZE') or CLEARANCE_INSERT_BATCH
+    update_background_job(job_id, status='running')
+    
+    try:
+        current_pallet = ''
+        errors = []
+        pending = []
+        
+        with open(path, 'rb') as stream, closing(_sheet_rows(stream)) as rows:
+            for row_num, row in enumerate(rows, 1):
+                row = tuple(row) + (None,) * (CLEARANCE_ROW_WIDTH - len(row))
+                try:
+                    # Classify the row on the type the reader already gave the first
+                    # cell - numbers are quantities as-is, no str()/float() round trip
+                    first = row[0]
+                    if isinstance(first, str):
+                        # Empty cell (calamine), title row or header row
+                        if not first or first in CLEARANCE_SKIP_LABELS:
+                            continue
+                        
+                        # Pallet header
+                        if 'Pallet' in first:
+                            current_pallet = first
+                            continue
+                        
+                        # Quantity typed in as text - the rare case, so the exception is cheap overall
+                        try:
+                            first = float(first)
+                        except ValueError:
+                            continue
+                    elif isinstance(first, bool) or not isinstance(first, (int, float)):
+                        # Empty cell (openpyxl), dates, booleans
+                        continue
+                    
+                    # Skip zero/negative qty
+                    if not first > 0:
+                        continue
+                    
+                    # DATA ROW - just fucking add it
+                    qty = int(first)
+                    cost_price = float(row[4] or 0)
+                    
+                    # Handle total_price - might be a formula or None
+                    if row[5] and not isinstance(row[5], str):
+                        total_price = float(row[5])
+                    else:
+                        total_price = qty * cost_price
+                    
+                    pending.append({
+                        'qty': qty,
+                        'qty_sold': 0,
+                        'supplier_code': _cell_text(row[1]),
+                        'his_code': _cell_text(row[2]),
+                        'description': _cell_text(row[3]),
+                        'cost_price': cost_price,
+                        'total_price': total_price,
+                        'supplier_link': _cell_text(row[7]),
+                        'pallet': current_pallet,
+                        'created_by': user_id,
+                        'created_at': now,
+                        'updated_at': now
+                    })
+                    
+                except Exception as e:
+                    errors.append(f"Row {row_num}: {str(e)}")
+                    continue
+                
+                # Plain executemany INSERTs - no ORM object or unit-of-work bookkeeping per row.
+                # Each batch is committed on its own so a failure only loses the batch in flight
+                if len(pending) >= batch_size:
+                    items_added += _save_clearance_batch(pending)
+                    pending = []
+                    update_background_job(job_id, processed=row_num)
+        
+        if pending:
+            items_added += _save_clearance_batch(pending)
+        
+        message = f"Import complete! Added {items_added} items from {row_num} total rows."
+        if errors:
+            # ALL errors, one per line after the summary
+            message += f" {len(errors)} errors occurred.\n" + '\n'.join(errors)
+        
+        update_background_job(job_id, status='done', processed=row_num, finished_at=datetime.utcnow(), message=message)
+        
+    except SQLAlchemyError as e:
+        # Stop at the first failed batch - the batches before it are already committed
+        db.session.rollback()
+        logger.error(f"Database error in clearance import job {job_id}: {e}", exc_info=True)
+        update_background_job(job_id, status='failed', processed=row_num, finished_at=datetime.utcnow(),
+                              message=f'Database error after saving {items_added} items (row {row_num}): {str(e)}')
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in clearance import job {job_id}: {e}", exc_info=True)
+        update_background_job(job_id, status='failed', processed=row_num, finished_at=datetime.utcnow(),
+                              message=f'Error processing file after saving {items_added} items: {str(e)}')
+    finally:
+        os.remove(path)
+
 @clearance_stock_bp.route('/')
 @login_required
 def clearance_stock():
@@ -18,38 +247,77 @@ def clearance_stock():
 @clearance_stock_bp.route('/api/clearance-stock')
 @login_required
 def get_clearance_stock():
+    """
+    One page of clearance items (?page, ?per_page up to CLEARANCE_MAX_PER_PAGE),
+    optionally filtered by ?search / ?pallet and trimmed to ?fields=qty,description,...
+    Totals cover every matching item, not just the page.
+    """
     search = request.args.get('search', '').strip()
     pallet_filter = request.args.get('pallet', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', CLEARANCE_PER_PAGE, type=int), 1), CLEARANCE_MAX_PER_PAGE)
     
-    query = ClearanceStock.query
+    # Plain column rows in to_dict()'s shape - no ClearanceStock instances are built.
+    # Unknown field names are ignored; id is always sent
+    fields = request.args.get('fields', '').strip()
+    if fields:
+        columns = [CLEARANCE_LIST_COLUMNS['id']] + [
+            CLEARANCE_LIST_COLUMNS[name] for name in dict.fromkeys(fields.split(','))
+            if name in CLEARANCE_LIST_COLUMNS and name != 'id'
+        ]
+    else:
+        columns = list(CLEARANCE_LIST_COLUMNS.values())
     
+    filters = []
     if search:
-        query = query.filter(
-            or_(
-                ClearanceStock.supplier_code.ilike(f'%{search}%'),
-                ClearanceStock.his_code.ilike(f'%{search}%'),
-                ClearanceStock.description.ilike(f'%{search}%'),
-                ClearanceStock.pallet.ilike(f'%{search}%')
-            )
-        )
+        filters.append(CLEARANCE_SEARCH_TEXT.ilike(f'%{search}%'))
     
     if pallet_filter:
-        query = query.filter(ClearanceStock.pallet == pallet_filter)
+        filters.append(ClearanceStock.pallet == pallet_filter)
     
-    items = query.order_by(ClearanceStock.pallet, ClearanceStock.description).all()
+    total, units, value = db.session.execute(
+        select(
+            func.count(ClearanceStock.id),
+            func.coalesce(func.sum(ClearanceStock.qty), 0),
+            func.coalesce(func.sum(ClearanceStock.total_price), 0)
+        ).where(*filters)
+    ).one()
     
-    return jsonify({
+    rows = db.session.execute(
+        select(*columns).where(*filters)
+        .order_by(ClearanceStock.pallet, ClearanceStock.description, ClearanceStock.id)
+        .limit(per_page).offset((page - 1) * per_page)
+    ).mappings()
+    
+    # ojsonify writes the datetimes as ISO 8601 itself
+    return ojsonify({
         'success': True,
-        'items': [item.to_dict() for item in items]
+        'items': [dict(row) for row in rows],
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': -(-total // per_page),
+        'has_next': page * per_page < total,
+        'has_prev': page > 1,
+        'total_units': units,
+        'total_value': value
     })
 
 @clearance_stock_bp.route('/api/clearance-stock/pallets')
 @login_required
+@cache.cached(timeout=PALLETS_CACHE_TIMEOUT, key_prefix=PALLETS_CACHE_KEY)
 def get_pallets():
-    pallets = db.session.query(ClearanceStock.pallet).distinct().filter(ClearanceStock.pallet.isnot(None)).all()
+    # NULL and blank pallets are dropped by the database; the GROUP BY reads the
+    # pallet-led index in order, so no separate sort or hash step is needed
+    pallets = db.session.execute(
+        select(ClearanceStock.pallet).where(
+            ClearanceStock.pallet.isnot(None),
+            ClearanceStock.pallet != ''
+        ).group_by(ClearanceStock.pallet).order_by(ClearanceStock.pallet)
+    ).scalars().all()
     return jsonify({
         'success': True,
-        'pallets': [p[0] for p in pallets if p[0]]
+        'pallets': pallets
     })
 
 @clearance_stock_bp.route('/api/clearance-stock', methods=['POST'])
@@ -175,84 +443,28 @@ def upload_clearance_file():
         return jsonify({'success': False, 'message': 'Please upload an Excel file (.xlsx or .xlsm)'}), 400
     
     try:
-        # Read file into memory
-        file_content = BytesIO(file.read())
-        wb = openpyxl.load_workbook(file_content, data_only=True)  # This evaluates formulas
-        sheet = wb['Sheet1']
-        
-        current_pallet = ''
-        items_added = 0
-        errors = []
-        row_num = 0
-        
-        for row_num, row in enumerate(sheet.iter_rows(min_row=1, values_only=True), 1):
-            try:
-                # Pallet header
-                if row[0] and 'Pallet' in str(row[0]):
-                    current_pallet = str(row[0])
-                    continue
-                
-                # Title row or header row
-                if row[0] == 'Qty' or row[0] == '2024 Stock Clearance':
-                    continue
-                
-                # Empty row
-                if not row[0]:
-                    continue
-                
-                # Skip non-numeric qty
-                try:
-                    test_qty = float(str(row[0]))
-                    if test_qty <= 0:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-                
-                # DATA ROW - just fucking add it
-                qty = int(float(str(row[0])))
-                cost_price = float(row[4] or 0)
-                
-                # Handle total_price - might be a formula or None
-                if row[5] and not isinstance(row[5], str):
-                    total_price = float(row[5])
-                else:
-                    total_price = qty * cost_price
-                
-                item = ClearanceStock(
-                    qty=qty,
-                    qty_sold=0,
-                    supplier_code=str(row[1] or ''),
-                    his_code=str(row[2] or ''),
-                    description=str(row[3] or ''),
-                    cost_price=cost_price,
-                    total_price=total_price,
-                    supplier_link=str(row[7] or '') if len(row) > 7 else '',
-                    pallet=current_pallet,
-                    created_by=current_user.id
-                )
-                db.session.add(item)
-                items_added += 1
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                continue
+        # Save the upload so the worker thread can read it after this request ends
+        upload_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, f"{uuid.uuid4().hex[:8]}_{secure_filename(file.filename)}")
+        file.save(path)
         
+        job = BackgroundJob(kind='clearance_import', filename=file.filename, created_by=current_user.id)
+        db.session.add(job)
         db.session.commit()
         
-        print(f"Import complete! Added {items_added} items. Errors: {len(errors)}")
-        
-        message = f"Import complete! Added {items_added} items from {row_num} total rows."
-        if errors:
-            message += f" {len(errors)} errors occurred."
-        
-        return jsonify({
-            'success': True,
-            'message': message,
-            'items_added': items_added,
-            'total_rows': row_num,
-            'errors': errors  # Return ALL errors, not just first 10
-        })
-        
+        run_in_background(_run_clearance_import, job.id, path, current_user.id)
+        return jsonify({'success': True, 'message': 'Import started', 'job_id': job.id})
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': f'Error processing file: {str(e)}'}), 400
\ No newline at end of file
+        return jsonify({'success': False, 'message': f'Error processing file: {str(e)}'}), 400
+
+@clearance_stock_bp.route('/api/clearance-stock/upload/<int:job_id>')
+@login_required
+def upload_progress(job_id):
+    """Polled by the upload dialog while a background clearance import runs"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    
+    job = BackgroundJob.query.filter_by(id=job_id, kind='clearance_import').first_or_404()
+    return ojsonify({'success': True, **job.to_dict()})
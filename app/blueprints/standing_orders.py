@@ -4,6 +4,7 @@ from app import db
 from app.models import (StandingOrder, StandingOrderItem, StandingOrderLog, 
                        StandingOrderSchedule, Customer, User)
 from datetime import datetime, date, timedelta
+from collections import Counter, defaultdict
 import json
 import calendar
 
@@ -508,18 +509,16 @@ def schedule_view():
     ).order_by(StandingOrderSchedule.scheduled_date, Customer.name).all()
     
     # Group by date
-    schedules_by_date = {}
+    schedules_by_date = defaultdict(list)
     for schedule in schedules:
-        date_key = schedule.scheduled_date
-        if date_key not in schedules_by_date:
-            schedules_by_date[date_key] = []
-        schedules_by_date[date_key].append(schedule)
+        schedules_by_date[schedule.scheduled_date].append(schedule)
     
-    # Calculate completion stats
+    # Calculate completion stats - one pass over the statuses
     total = len(schedules)
-    completed = len([s for s in schedules if s.status == 'created'])
-    pending = len([s for s in schedules if s.status == 'pending'])
-    skipped = len([s for s in schedules if s.status == 'skipped'])
+    status_counts = Counter(s.status for s in schedules)
+    completed = status_counts['created']
+    pending = status_counts['pending']
+    skipped = status_counts['skipped']
     
     return render_template('standing_order_schedule.html',
                          view_type=view_type,
@@ -625,18 +624,16 @@ def print_schedule_view():
     ).order_by(StandingOrderSchedule.scheduled_date, Customer.name).all()
     
     # Group by date
-    schedules_by_date = {}
+    schedules_by_date = defaultdict(list)
     for schedule in schedules:
-        date_key = schedule.scheduled_date
-        if date_key not in schedules_by_date:
-            schedules_by_date[date_key] = []
-        schedules_by_date[date_key].append(schedule)
+        schedules_by_date[schedule.scheduled_date].append(schedule)
     
-    # Calculate completion stats
+    # Calculate completion stats - one pass over the statuses
     total = len(schedules)
-    completed = len([s for s in schedules if s.status == 'created'])
-    pending = len([s for s in schedules if s.status == 'pending'])
-    skipped = len([s for s in schedules if s.status == 'skipped'])
+    status_counts = Counter(s.status for s in schedules)
+    completed = status_counts['created']
+    pending = status_counts['pending']
+    skipped = status_counts['skipped']
     
     return render_template(
         'print_schedule_view.html',
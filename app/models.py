@@ -2,10 +2,20 @@ from app import db, login_manager
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+from sqlalchemy import event, case
+import heapq
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    """Hash with the current default method, made once, for timing-equal failed logins"""
+    return generate_password_hash('dummy-password')
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -51,6 +61,12 @@ class User(db.Model, UserMixin):
             logger.error(f"Error checking password for user {self.username}: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def check_password_dummy(password):
+        """Spend the same hashing time as check_password when no user matched - always False"""
+        check_password_hash(_dummy_password_hash(), password)
+        return False
+    
     def generate_temp_password(self):
         """Generate a secure temporary password"""
         import secrets
@@ -179,9 +195,8 @@ class User(db.Model, UserMixin):
         except Exception as e:
             logger.error(f"Error loading stock transactions for user {self.id}: {e}", exc_info=True)
         
-        # Sort by date and return limited results
-        activities.sort(key=lambda x: x['date'], reverse=True)
-        return activities[:limit]
+        # Newest first, limited - a bounded heap instead of sorting the whole list
+        return heapq.nlargest(limit, activities, key=itemgetter('date'))
 
 class TodoItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -213,12 +228,20 @@ class Customer(db.Model):
     address = db.Column(db.String(200))
     notes = db.Column(db.Text)
     callsheet_notes = db.Column(db.Text)  # Persistent across all callsheets
+    
+    # Lifetime call outcome counters - kept in step with CallHistory inserts/deletes
+    total_calls = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    orders = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    no_answers = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    declined = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_call_date = db.Column(db.DateTime)
     # Relationships
     addresses = db.relationship('CustomerAddress', backref='customer', lazy=True, cascade='all, delete-orphan')
 
     __table_args__ = (
         db.Index('idx_customer_account', 'account_number'),
         db.Index('idx_customer_name', 'name'),
+        db.Index('idx_customer_total_calls', 'total_calls'),
     )
 
     def to_dict(self):
@@ -304,7 +327,8 @@ class Product(db.Model):
     description = db.Column(db.Text)
 
     __table_args__ = (
-        db.Index('idx_product_code', 'code'),
+        # Unique so imports can upsert with ON CONFLICT (code)
+        db.Index('idx_product_code', 'code', unique=True),
         db.Index('idx_product_name', 'name'),
     )
 
@@ -317,7 +341,17 @@ class Callsheet(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    entries = db.relationship('CallsheetEntry', backref='callsheet', lazy=True, cascade='all, delete-orphan')
+    # Last position handed out to an entry - claimed with an atomic increment, see callsheets._claim_position
+    next_position = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Active entries first, each group in call order - the index page partitions in one pass
+    entries = db.relationship('CallsheetEntry', backref='callsheet', lazy=True, cascade='all, delete-orphan',
+                              order_by='[CallsheetEntry.is_paused, CallsheetEntry.position, CallsheetEntry.id]')
+    
+    __table_args__ = (
+        # One active callsheet per name and day - inactive (deleted/archived) ones may repeat
+        db.Index('ux_callsheet_active_name', 'name', 'day_of_week', unique=True,
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')),
+    )
     
     def __repr__(self):
         return f'<Callsheet {self.name} - {self.day_of_week}>'
@@ -361,19 +395,25 @@ class CallsheetEntry(db.Model):
         }
         return status_badges.get(self.call_status, 'secondary')
     
+    STATUS_DISPLAY = {
+        'not_called': 'Not Called',
+        'no_answer': 'No Answer',
+        'declined': 'Declined',
+        'ordered': 'Ordered',
+        'callback': 'Callback'
+    }
+    
     def get_status_display(self):
-        status_display = {
-            'not_called': 'Not Called',
-            'no_answer': 'No Answer',
-            'declined': 'Declined',
-            'ordered': 'Ordered',
-            'callback': 'Callback'
-        }
-        return status_display.get(self.call_status, 'Not Called')
+        return self.STATUS_DISPLAY.get(self.call_status, 'Not Called')
 
     __table_args__ = (
         db.Index('idx_callsheet_position', 'callsheet_id', 'position'),
-        db.Index('idx_callsheet_status', 'callsheet_id', 'is_paused'),
+        # Matches the entries relationship order - also covers the old (callsheet_id, is_paused) lookups
+        db.Index('idx_cse_cs_paused_position', 'callsheet_id', 'is_paused', 'position'),
+        # Duplicate check when adding a customer/address to a callsheet
+        db.Index('idx_cse_cs_customer_address', 'callsheet_id', 'customer_id', 'address_label'),
+        db.Index('idx_cse_cs_status', 'callsheet_id', 'call_status'),
+        db.Index('idx_cse_updated_user_status', 'updated_at', 'user_id', 'call_status'),
     )
 
 class CallHistory(db.Model):
@@ -402,6 +442,9 @@ class CallHistory(db.Model):
         db.Index('idx_call_history_customer_date', 'customer_id', 'call_date'),
         db.Index('idx_call_history_status', 'call_status'),
         db.Index('idx_call_history_week', 'year', 'week_number'),
+        db.Index('idx_callhistory_date_status', 'call_date', 'call_status'),
+        db.Index('ix_call_history_date_cust_status', 'call_date', 'customer_id', 'call_status',
+                 postgresql_include=['id']),
     )
 
     def to_dict(self):
@@ -418,6 +461,49 @@ class CallHistory(db.Model):
             'year': self.year
         }
 
+
+# Counter column on Customer bumped for each CallHistory status
+CALL_OUTCOME_COUNTERS = {
+    'ordered': 'orders',
+    'no_answer': 'no_answers',
+    'declined': 'declined',
+}
+
+def _bump_call_counters(connection, target, step):
+    """Add step (+1/-1) to the customer's call counters inside the current flush"""
+    customer = Customer.__table__
+    values = {'total_calls': customer.c.total_calls + step}
+    counter = CALL_OUTCOME_COUNTERS.get(target.call_status)
+    if counter:
+        values[counter] = customer.c[counter] + step
+    if step > 0:
+        # Deletes leave last_call_date alone - it only ever moves forward
+        values['last_call_date'] = case(
+            (customer.c.last_call_date > target.call_date, customer.c.last_call_date),
+            else_=target.call_date
+        )
+    connection.execute(customer.update().where(customer.c.id == target.customer_id).values(**values))
+
+@event.listens_for(CallHistory, 'after_insert')
+def _count_call(mapper, connection, target):
+    _bump_call_counters(connection, target, 1)
+
+@event.listens_for(CallHistory, 'after_delete')
+def _uncount_call(mapper, connection, target):
+    _bump_call_counters(connection, target, -1)
+
+def _copy_json_fields(target, fields):
+    """Set each column in fields (column -> key) from the JSON object in target.data, as text"""
+    try:
+        data = json.loads(target.data or '{}')
+    except (TypeError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    for column, key in fields.items():
+        value = data.get(key)
+        setattr(target, column, str(value) if value is not None else None)
+
 class CallsheetArchive(db.Model):
     """Store archived callsheet data for historical viewing"""
     id = db.Column(db.Integer, primary_key=True)
@@ -427,6 +513,30 @@ class CallsheetArchive(db.Model):
     archived_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     archived_by_user = db.relationship('User', backref='archived_callsheets')
+    
+    # Completion snapshot summary, copied out of data on write so the history list
+    # never loads or parses the snapshot itself (NULL for whole-month archives)
+    callsheet_name = db.Column(db.String(100), nullable=True)
+    day_of_week = db.Column(db.String(10), nullable=True)
+    completed_date = db.Column(db.String(32), nullable=True)
+    completed_by = db.Column(db.String(20), nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_callsheet_archive_archived_at', 'archived_at'),
+    )
+
+# CallsheetArchive column <- key in CallsheetArchive.data
+ARCHIVE_DATA_FIELDS = {
+    'callsheet_name': 'callsheet_name',
+    'day_of_week': 'day_of_week',
+    'completed_date': 'completed_date',
+    'completed_by': 'completed_by',
+}
+
+@event.listens_for(CallsheetArchive, 'before_insert')
+@event.listens_for(CallsheetArchive, 'before_update')
+def _extract_archive_fields(mapper, connection, target):
+    _copy_json_fields(target, ARCHIVE_DATA_FIELDS)
 
 class Form(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -441,6 +551,13 @@ class Form(db.Model):
     completed_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     is_archived = db.Column(db.Boolean, default=False)
     
+    # Copied out of data on every write (see _extract_form_fields) so reports
+    # group on plain columns instead of parsing the JSON per row
+    reason = db.Column(db.Text, nullable=True)
+    form_kind = db.Column(db.Text, nullable=True)
+    customer_account = db.Column(db.Text, nullable=True)
+    customer_name = db.Column(db.Text, nullable=True)
+    
     # Define the completer relationship separately
     completer = db.relationship('User', foreign_keys=[completed_by], backref='completed_forms')
 
@@ -448,8 +565,25 @@ class Form(db.Model):
         db.Index('idx_form_user_date', 'user_id', 'date_created'),
         db.Index('idx_form_status', 'is_completed', 'is_archived'),
         db.Index('idx_form_type', 'type'),
+        db.Index('idx_form_created_type', 'date_created', 'type'),
+        db.Index('idx_form_created_completed', 'date_created', 'is_completed'),
+        db.Index('idx_form_type_reason', 'type', 'reason'),
     )
 
+# Form column <- key in Form.data
+FORM_DATA_FIELDS = {
+    'reason': 'reason',
+    'form_kind': 'form_type',
+    'customer_account': 'customer_account',
+    'customer_name': 'customer_name',
+}
+
+@event.listens_for(Form, 'before_insert')
+@event.listens_for(Form, 'before_update')
+def _extract_form_fields(mapper, connection, target):
+    """Keep the FORM_DATA_FIELDS columns in step with the JSON in target.data"""
+    _copy_json_fields(target, FORM_DATA_FIELDS)
+
 class CustomerStock(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
@@ -500,6 +634,10 @@ class StockTransaction(db.Model):
             'created_by': self.user.username
         }
 
+    __table_args__ = (
+        db.Index('idx_stock_txn_date_type', 'transaction_date', 'transaction_type'),
+    )
+
 class StandingOrder(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
@@ -640,6 +778,10 @@ class StandingOrderLog(db.Model):
     # Relationships
     user = db.relationship('User', backref='standing_order_actions')
 
+    __table_args__ = (
+        db.Index('idx_standing_order_log_performed_action', 'performed_at', 'action_type'),
+    )
+
 # Add this to app/models.py
 
 class ClearanceStock(db.Model):
@@ -662,7 +804,10 @@ class ClearanceStock(db.Model):
     __table_args__ = (
         db.Index('idx_clearance_supplier_code', 'supplier_code'),
         db.Index('idx_clearance_his_code', 'his_code'),
-        db.Index('idx_clearance_pallet', 'pallet'),
+        # Serves the list's pallet filter and its paged ORDER BY pallet, description, id
+        db.Index('idx_clearance_pallet_description_id', 'pallet', 'description', 'id'),
+        # ix_clearance_search_trgm (PostgreSQL GIN trigram index for the list search) is
+        # created by its migration only - see clearance_stock.CLEARANCE_SEARCH_TEXT
     )
     
     def to_dict(self):
@@ -679,4 +824,69 @@ class ClearanceStock(db.Model):
             'pallet': self.pallet,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+class BackgroundJob(db.Model):
+    """Long-running work (e.g. file imports) handed off the request thread"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'product_import'
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    filename = db.Column(db.String(255))
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)  # None when the size isn't known up front
+    message = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    user = db.relationship('User', backref='background_jobs')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'filename': self.filename,
+            'processed': self.processed,
+            'total': self.total,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class DailyActivityStats(db.Model):
+    """Per-day report counts rolled up from forms, stock transactions and callsheet calls"""
+    day = db.Column(db.Date, primary_key=True)
+    forms = db.Column(db.Integer, nullable=False, default=0)
+    stock = db.Column(db.Integer, nullable=False, default=0)
+    callsheets = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class CustomerCallStatsDaily(db.Model):
+    """Per-customer, per-day call outcome counts rolled up from call_history"""
+    __tablename__ = 'customer_call_stats_daily'
+
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    ordered = db.Column(db.Integer, nullable=False, default=0)
+    declined = db.Column(db.Integer, nullable=False, default=0)
+    no_answer = db.Column(db.Integer, nullable=False, default=0)
+    last_call = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_customer_call_stats_day', 'day', 'customer_id'),
+    )
+
+class CustomerCallStatsCoverage(db.Model):
+    """
+    The contiguous day range (inclusive) that customer_call_stats_daily holds complete
+    rows for - a single row. Days outside it are counted live from call_history, so a
+    day with no rollup rows inside the range really had no calls.
+    """
+    __tablename__ = 'customer_call_stats_coverage'
+
+    id = db.Column(db.Integer, primary_key=True)
+    first_day = db.Column(db.Date, nullable=False)
+    last_day = db.Column(db.Date, nullable=False)
@@ -10,8 +10,11 @@ from app.models import (User, Customer, CallsheetEntry, Form, Callsheet, Callshe
                         TodoItem, CompanyUpdate, StandingOrder, StandingOrderLog,
                         StockTransaction, Product)
 from app.forms import CreateUserForm, EditUserForm
+from app.utils import ojsonify
 from functools import wraps
+from operator import itemgetter
 from datetime import datetime
+import heapq
 import logging
 
 logger = logging.getLogger(__name__)
@@ -439,9 +442,10 @@ def get_recent_activity():
             Callsheet, CallsheetEntry.callsheet_id == Callsheet.id
         ).order_by(CallsheetEntry.id.desc()).limit(5).all()
 
+        now = datetime.now()
         for entry in recent_callsheet_additions:
             # Only show if this was recently created (within last few days)
-            if (datetime.now() - entry.callsheet.created_at).days <= 7:
+            if (now - entry.callsheet.created_at).days <= 7:
                 activities.append({
                     'type': 'callsheet_customer_added',
                     'description': f'Added {entry.customer.name} to callsheet "{entry.callsheet.name}"',
@@ -542,14 +546,9 @@ def get_recent_activity():
     except Exception as e:
         logger.error(f"Error loading stock transactions: {e}", exc_info=True)
 
-    # Sort all activities by timestamp and limit to 15
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    activities = activities[:15]
+    # Newest 15 activities - a bounded heap instead of sorting the whole list
+    activities = heapq.nlargest(15, activities, key=itemgetter('timestamp'))
 
-    # Convert timestamps to ISO format for JavaScript
-    for activity in activities:
-        if hasattr(activity['timestamp'], 'isoformat'):
-            activity['timestamp'] = activity['timestamp'].isoformat()
-
-    return jsonify(activities)
+    # orjson writes the datetime timestamps as ISO 8601 for JavaScript
+    return ojsonify(activities)
     
\ No newline at end of file
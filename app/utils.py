@@ -6,9 +6,15 @@ used across multiple blueprints and routes.
 """
 
 import logging
-from app.models import Customer, CustomerAddress
+import threading
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from app.models import Customer, CustomerAddress, BackgroundJob
 from app import db
+from sqlalchemy import update
 import bleach
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -258,3 +264,79 @@ def allowed_file(filename, allowed_extensions=None):
 
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
+
+
+# ==================== JSON RESPONSES ====================
+
+def _orjson_default(obj):
+    """Serialize types orjson does not handle natively (e.g. Decimal sums from Postgres)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        # datetime subclasses such as pandas Timestamp - same ISO 8601 text orjson writes
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def ojsonify(obj):
+    """
+    Drop-in replacement for jsonify that serializes with orjson.
+
+    orjson is several times faster than the stdlib json module on the large
+    list-of-dict payloads returned by the report endpoints, and serializes
+    datetimes (as ISO 8601) and numpy values natively, so callers can pass
+    them through without isoformat()/int() conversions.
+
+    Args:
+        obj: Any JSON-serializable structure (dict, list, ...)
+
+    Returns:
+        Response: application/json response
+    """
+    return current_app.response_class(
+        orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype='application/json'
+    )
+
+
+# ==================== BACKGROUND JOBS ====================
+
+def run_in_background(func, *args):
+    """
+    Run func(*args) on a daemon thread inside its own app context.
+
+    Used to hand long work (large imports) off the request thread so the
+    request can return straight away. func gets a fresh database session.
+
+    Args:
+        func: Callable to run
+        *args: Positional arguments for func - pass ids, not ORM objects
+
+    Returns:
+        threading.Thread: The started thread
+    """
+    app = current_app._get_current_object()
+
+    def runner():
+        with app.app_context():
+            func(*args)
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    return thread
+
+
+def update_background_job(job_id, **values):
+    """
+    Write a BackgroundJob's status/progress and commit it straight away.
+
+    Uses a Core UPDATE rather than the ORM object, since imports expunge
+    the session between batches; values may be SQL expressions such as
+    BackgroundJob.processed + n.
+
+    Args:
+        job_id (int): BackgroundJob id
+        **values: Columns to set
+    """
+    db.session.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+    db.session.commit()
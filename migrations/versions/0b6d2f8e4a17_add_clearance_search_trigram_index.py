@@ -0,0 +1,35 @@
+"""Add trigram index for the clearance stock search (PostgreSQL only)
+
+Revision ID: 0b6d2f8e4a17
+Revises: f3a9c6e2d170
+Create Date: 2026-10-16 21:14:52.684019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6d2f8e4a17'
+down_revision = 'f3a9c6e2d170'
+branch_labels = None
+depends_on = None
+
+# Must match app.blueprints.clearance_stock.CLEARANCE_SEARCH_TEXT for the planner to use the index
+SEARCH_TEXT = ("coalesce(supplier_code, '') || ' ' || coalesce(his_code, '') || ' ' || "
+               "coalesce(description, '') || ' ' || coalesce(pallet, '')")
+
+
+def upgrade():
+    # Other backends keep scanning for '%term%' - there is no index type that helps there
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_clearance_search_trgm', 'clearance_stock', [sa.text(f'({SEARCH_TEXT}) gin_trgm_ops')],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_clearance_search_trgm', table_name='clearance_stock')
@@ -0,0 +1,49 @@
+"""Add call outcome counters to customer
+
+Revision ID: 2a7d5e9c4f81
+Revises: 6c2f8a4d9e13
+Create Date: 2026-10-16 20:41:09.336518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7d5e9c4f81'
+down_revision = '6c2f8a4d9e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_calls', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('orders', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('no_answers', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('declined', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('last_call_date', sa.DateTime(), nullable=True))
+        batch_op.create_index('idx_customer_total_calls', ['total_calls'], unique=False)
+
+    # Backfill from the existing call history; the app keeps them current from here on
+    op.execute("""
+        UPDATE customer SET
+            total_calls = (SELECT COUNT(*) FROM call_history h WHERE h.customer_id = customer.id),
+            orders = (SELECT COUNT(*) FROM call_history h
+                      WHERE h.customer_id = customer.id AND h.call_status = 'ordered'),
+            no_answers = (SELECT COUNT(*) FROM call_history h
+                          WHERE h.customer_id = customer.id AND h.call_status = 'no_answer'),
+            declined = (SELECT COUNT(*) FROM call_history h
+                        WHERE h.customer_id = customer.id AND h.call_status = 'declined'),
+            last_call_date = (SELECT MAX(h.call_date) FROM call_history h WHERE h.customer_id = customer.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.drop_index('idx_customer_total_calls')
+        batch_op.drop_column('last_call_date')
+        batch_op.drop_column('declined')
+        batch_op.drop_column('no_answers')
+        batch_op.drop_column('orders')
+        batch_op.drop_column('total_calls')
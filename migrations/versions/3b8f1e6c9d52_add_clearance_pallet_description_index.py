@@ -0,0 +1,29 @@
+"""Replace clearance_stock pallet index with (pallet, description)
+
+Revision ID: 3b8f1e6c9d52
+Revises: a6e3f9d1c245
+Create Date: 2026-10-16 17:58:13.402786
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f1e6c9d52'
+down_revision = 'a6e3f9d1c245'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (pallet, description) covers everything the single-column pallet index did
+    with op.batch_alter_table('clearance_stock', schema=None) as batch_op:
+        batch_op.drop_index('idx_clearance_pallet')
+        batch_op.create_index('idx_clearance_pallet_description', ['pallet', 'description'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clearance_stock', schema=None) as batch_op:
+        batch_op.drop_index('idx_clearance_pallet_description')
+        batch_op.create_index('idx_clearance_pallet', ['pallet'], unique=False)
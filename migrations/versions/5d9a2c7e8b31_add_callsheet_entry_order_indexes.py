@@ -0,0 +1,31 @@
+"""Add callsheet_entry indexes for entry ordering and duplicate checks
+
+Revision ID: 5d9a2c7e8b31
+Revises: e8d4b1f6a027
+Create Date: 2026-10-16 17:32:05.184637
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a2c7e8b31'
+down_revision = 'e8d4b1f6a027'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (callsheet_id, is_paused, position) supersedes the (callsheet_id, is_paused) prefix index
+    with op.batch_alter_table('callsheet_entry', schema=None) as batch_op:
+        batch_op.drop_index('idx_callsheet_status')
+        batch_op.create_index('idx_cse_cs_paused_position', ['callsheet_id', 'is_paused', 'position'], unique=False)
+        batch_op.create_index('idx_cse_cs_customer_address', ['callsheet_id', 'customer_id', 'address_label'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('callsheet_entry', schema=None) as batch_op:
+        batch_op.drop_index('idx_cse_cs_customer_address')
+        batch_op.drop_index('idx_cse_cs_paused_position')
+        batch_op.create_index('idx_callsheet_status', ['callsheet_id', 'is_paused'], unique=False)
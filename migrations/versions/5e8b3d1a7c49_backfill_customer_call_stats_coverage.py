@@ -0,0 +1,65 @@
+"""Backfill customer_call_stats_daily and record the day range it covers
+
+Revision ID: 5e8b3d1a7c49
+Revises: 9a4c7e1f3b28
+Create Date: 2026-10-16 22:31:06.518207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timedelta
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b3d1a7c49'
+down_revision = '9a4c7e1f3b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_call_stats_coverage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_day', sa.Date(), nullable=False),
+    sa.Column('last_day', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Rebuild the rollup from all of call_history up to yesterday in one INSERT ... SELECT,
+    # replacing whatever partial windows the nightly command wrote before coverage existed
+    call_history = sa.table('call_history', sa.column('customer_id', sa.Integer),
+                            sa.column('call_date', sa.DateTime), sa.column('call_status', sa.String))
+    stats = sa.table('customer_call_stats_daily', sa.column('customer_id', sa.Integer),
+                     sa.column('day', sa.Date), sa.column('total', sa.Integer),
+                     sa.column('ordered', sa.Integer), sa.column('declined', sa.Integer),
+                     sa.column('no_answer', sa.Integer), sa.column('last_call', sa.DateTime))
+    coverage = sa.table('customer_call_stats_coverage', sa.column('id', sa.Integer),
+                        sa.column('first_day', sa.Date), sa.column('last_day', sa.Date))
+
+    last_day = datetime.now().date() - timedelta(days=1)
+    end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    call_day = sa.func.date(call_history.c.call_date)
+    status = call_history.c.call_status
+
+    bind = op.get_bind()
+    bind.execute(stats.delete())
+    bind.execute(stats.insert().from_select(
+        ['customer_id', 'day', 'total', 'ordered', 'declined', 'no_answer', 'last_call'],
+        sa.select(
+            call_history.c.customer_id,
+            call_day,
+            sa.func.count(),
+            sa.func.sum(sa.case((status == 'ordered', 1), else_=0)),
+            sa.func.sum(sa.case((status == 'declined', 1), else_=0)),
+            sa.func.sum(sa.case((status == 'no_answer', 1), else_=0)),
+            sa.func.max(call_history.c.call_date)
+        ).where(call_history.c.call_date < end).group_by(call_history.c.customer_id, call_day)
+    ))
+
+    first_call = bind.execute(sa.select(sa.func.min(call_history.c.call_date))).scalar()
+    first_day = min(first_call.date(), last_day) if first_call else last_day
+    bind.execute(coverage.insert().values(id=1, first_day=first_day, last_day=last_day))
+
+
+def downgrade():
+    op.drop_table('customer_call_stats_coverage')
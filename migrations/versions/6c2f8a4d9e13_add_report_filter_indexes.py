@@ -0,0 +1,54 @@
+"""Add composite indexes for report filters
+
+Revision ID: 6c2f8a4d9e13
+Revises: b3c8d1e5f247
+Create Date: 2026-10-16 19:12:37.508214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2f8a4d9e13'
+down_revision = 'b3c8d1e5f247'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.create_index('idx_form_created_type', ['date_created', 'type'], unique=False)
+        batch_op.create_index('idx_form_created_completed', ['date_created', 'is_completed'], unique=False)
+
+    with op.batch_alter_table('stock_transaction', schema=None) as batch_op:
+        batch_op.create_index('idx_stock_txn_date_type', ['transaction_date', 'transaction_type'], unique=False)
+
+    with op.batch_alter_table('call_history', schema=None) as batch_op:
+        batch_op.create_index('idx_callhistory_date_status', ['call_date', 'call_status'], unique=False)
+
+    with op.batch_alter_table('callsheet_entry', schema=None) as batch_op:
+        batch_op.create_index('idx_cse_cs_status', ['callsheet_id', 'call_status'], unique=False)
+        batch_op.create_index('idx_cse_updated_user_status', ['updated_at', 'user_id', 'call_status'], unique=False)
+
+    with op.batch_alter_table('standing_order_log', schema=None) as batch_op:
+        batch_op.create_index('idx_standing_order_log_performed_action', ['performed_at', 'action_type'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('standing_order_log', schema=None) as batch_op:
+        batch_op.drop_index('idx_standing_order_log_performed_action')
+
+    with op.batch_alter_table('callsheet_entry', schema=None) as batch_op:
+        batch_op.drop_index('idx_cse_updated_user_status')
+        batch_op.drop_index('idx_cse_cs_status')
+
+    with op.batch_alter_table('call_history', schema=None) as batch_op:
+        batch_op.drop_index('idx_callhistory_date_status')
+
+    with op.batch_alter_table('stock_transaction', schema=None) as batch_op:
+        batch_op.drop_index('idx_stock_txn_date_type')
+
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.drop_index('idx_form_created_completed')
+        batch_op.drop_index('idx_form_created_type')
@@ -0,0 +1,67 @@
+"""Copy callsheet completion summary out of callsheet_archive.data into columns
+
+Revision ID: 7c2e5a9f1b84
+Revises: 3b8f1e6c9d52
+Create Date: 2026-10-16 19:42:17.308561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e5a9f1b84'
+down_revision = '3b8f1e6c9d52'
+branch_labels = None
+depends_on = None
+
+# column -> type, filled from the same key in callsheet_archive.data
+# as in app.models.ARCHIVE_DATA_FIELDS
+ARCHIVE_DATA_FIELDS = {
+    'callsheet_name': sa.String(length=100),
+    'day_of_week': sa.String(length=10),
+    'completed_date': sa.String(length=32),
+    'completed_by': sa.String(length=20),
+}
+
+
+def upgrade():
+    with op.batch_alter_table('callsheet_archive', schema=None) as batch_op:
+        for column, type_ in ARCHIVE_DATA_FIELDS.items():
+            batch_op.add_column(sa.Column(column, type_, nullable=True))
+        batch_op.create_index('idx_callsheet_archive_archived_at', ['archived_at'], unique=False)
+
+    # Backfill existing archives; the app fills the columns on every write from here on
+    archive = sa.table('callsheet_archive', sa.column('id', sa.Integer), sa.column('data', sa.Text),
+                       *[sa.column(column, type_) for column, type_ in ARCHIVE_DATA_FIELDS.items()])
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(archive.c.id, archive.c.data)).fetchall()
+    params = []
+    for archive_id, raw in rows:
+        try:
+            data = json.loads(raw or '{}')
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            # Whole-month archives hold a list of callsheets - no summary to copy
+            continue
+        row = {'archive_id': archive_id}
+        for column in ARCHIVE_DATA_FIELDS:
+            value = data.get(column)
+            row[column] = str(value) if value is not None else None
+        params.append(row)
+    for start in range(0, len(params), 1000):
+        bind.execute(
+            archive.update().where(archive.c.id == sa.bindparam('archive_id')).values(
+                {column: sa.bindparam(column) for column in ARCHIVE_DATA_FIELDS}
+            ),
+            params[start:start + 1000]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('callsheet_archive', schema=None) as batch_op:
+        batch_op.drop_index('idx_callsheet_archive_archived_at')
+        for column in reversed(list(ARCHIVE_DATA_FIELDS)):
+            batch_op.drop_column(column)
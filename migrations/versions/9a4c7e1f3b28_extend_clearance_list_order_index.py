@@ -0,0 +1,30 @@
+"""Extend the clearance_stock list-order index to (pallet, description, id)
+
+Revision ID: 9a4c7e1f3b28
+Revises: 0b6d2f8e4a17
+Create Date: 2026-10-16 21:52:40.271935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c7e1f3b28'
+down_revision = '0b6d2f8e4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Matches the paged list's full ORDER BY, id tiebreaker included, so a page is an
+    # index range read with no sort step; still serves pallet-only lookups and DISTINCT pallet
+    with op.batch_alter_table('clearance_stock', schema=None) as batch_op:
+        batch_op.drop_index('idx_clearance_pallet_description')
+        batch_op.create_index('idx_clearance_pallet_description_id', ['pallet', 'description', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clearance_stock', schema=None) as batch_op:
+        batch_op.drop_index('idx_clearance_pallet_description_id')
+        batch_op.create_index('idx_clearance_pallet_description', ['pallet', 'description'], unique=False)
@@ -0,0 +1,34 @@
+"""Make product code unique
+
+Revision ID: 9e1f4c7a2b60
+Revises: 4b7e2d9c1a35
+Create Date: 2026-10-16 17:05:48.201937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1f4c7a2b60'
+down_revision = '4b7e2d9c1a35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the newest row for any code that was imported more than once
+    op.execute(
+        'DELETE FROM product WHERE id NOT IN '
+        '(SELECT id FROM (SELECT MAX(id) AS id FROM product GROUP BY code) AS keep)'
+    )
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('idx_product_code')
+        batch_op.create_index('idx_product_code', ['code'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('idx_product_code')
+        batch_op.create_index('idx_product_code', ['code'], unique=False)
@@ -0,0 +1,32 @@
+"""Add next_position counter to callsheet
+
+Revision ID: a6e3f9d1c245
+Revises: 5d9a2c7e8b31
+Create Date: 2026-10-16 17:44:51.370928
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e3f9d1c245'
+down_revision = '5d9a2c7e8b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('callsheet', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_position', sa.Integer(), nullable=False, server_default='0'))
+
+    # Start each counter at the highest position already in use
+    op.execute("""
+        UPDATE callsheet SET next_position = COALESCE(
+            (SELECT MAX(e.position) FROM callsheet_entry e WHERE e.callsheet_id = callsheet.id), 0)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('callsheet', schema=None) as batch_op:
+        batch_op.drop_column('next_position')
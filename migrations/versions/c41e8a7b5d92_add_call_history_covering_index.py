@@ -0,0 +1,28 @@
+"""Add covering index on call_history date, customer and status
+
+Revision ID: c41e8a7b5d92
+Revises: 7f3b9c2e6d14
+Create Date: 2026-10-16 21:26:17.903452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e8a7b5d92'
+down_revision = '7f3b9c2e6d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # INCLUDE (id) only applies on PostgreSQL 11+; other backends get the plain composite
+    with op.batch_alter_table('call_history', schema=None) as batch_op:
+        batch_op.create_index('ix_call_history_date_cust_status', ['call_date', 'customer_id', 'call_status'],
+                              unique=False, postgresql_include=['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('call_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_call_history_date_cust_status')
@@ -0,0 +1,65 @@
+"""Copy reason, form type and customer fields out of form.data into columns
+
+Revision ID: e8d4b1f6a027
+Revises: c41e8a7b5d92
+Create Date: 2026-10-16 17:08:42.615204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8d4b1f6a027'
+down_revision = 'c41e8a7b5d92'
+branch_labels = None
+depends_on = None
+
+# column <- key in form.data, as in app.models.FORM_DATA_FIELDS
+FORM_DATA_FIELDS = {
+    'reason': 'reason',
+    'form_kind': 'form_type',
+    'customer_account': 'customer_account',
+    'customer_name': 'customer_name',
+}
+
+
+def upgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        for column in FORM_DATA_FIELDS:
+            batch_op.add_column(sa.Column(column, sa.Text(), nullable=True))
+        batch_op.create_index('idx_form_type_reason', ['type', 'reason'], unique=False)
+
+    # Backfill existing forms; the app fills the columns on every write from here on
+    form = sa.table('form', sa.column('id', sa.Integer), sa.column('data', sa.Text),
+                    *[sa.column(column, sa.Text) for column in FORM_DATA_FIELDS])
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(form.c.id, form.c.data)).fetchall()
+    params = []
+    for form_id, raw in rows:
+        try:
+            data = json.loads(raw or '{}')
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        row = {'form_id': form_id}
+        for column, key in FORM_DATA_FIELDS.items():
+            value = data.get(key)
+            row[column] = str(value) if value is not None else None
+        params.append(row)
+    for start in range(0, len(params), 1000):
+        bind.execute(
+            form.update().where(form.c.id == sa.bindparam('form_id')).values(
+                {column: sa.bindparam(column) for column in FORM_DATA_FIELDS}
+            ),
+            params[start:start + 1000]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.drop_index('idx_form_type_reason')
+        for column in reversed(list(FORM_DATA_FIELDS)):
+            batch_op.drop_column(column)
@@ -0,0 +1,27 @@
+"""Enforce one active callsheet per name and day with a partial unique index
+
+Revision ID: f3a9c6e2d170
+Revises: 7c2e5a9f1b84
+Create Date: 2026-10-16 20:48:33.150872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c6e2d170'
+down_revision = '7c2e5a9f1b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('callsheet', schema=None) as batch_op:
+        batch_op.create_index('ux_callsheet_active_name', ['name', 'day_of_week'], unique=True,
+                              postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active'))
+
+
+def downgrade():
+    with op.batch_alter_table('callsheet', schema=None) as batch_op:
+        batch_op.drop_index('ux_callsheet_active_name')